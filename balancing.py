@@ -1,5 +1,204 @@
 from __future__ import annotations
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Iterator, List, Tuple
 from threedeebeetree import Point
 
+# A subtree's point indices sorted along x, along y and along z.
+Orders = Tuple[List[int], List[int], List[int]]
+
+# split_subtree ranks every point of subtrees up to this size; past it, narrowing
+# the candidates down first costs less than ranking them all.
+PRUNE_ABOVE = 64
+# Past PRUNE_ABOVE, the points within size // MEDIAN_WINDOW of the middle along x
+# are ranked to bound the best split. The best split usually lies among them, so
+# the bound comes out tight, while ranking them stays a small share of the work.
+MEDIAN_WINDOW = 16
+
+def axis_orders(points: list[Point]) -> tuple[Orders, list[bool]]:
+    """
+        Sorts the indices of points along each axis, the only sorting the
+        layouts below ever do. Also reports, per axis, whether no two points
+        share a value along it.
+        :complexity: O(N log N) where N is the number of points
+    """
+    if len(set(points)) != len(points):
+        raise ValueError('Duplicate points')
+    columns = [[point[axis] for point in points] for axis in range(3)]
+    orders = tuple(sorted(range(len(points)), key=column.__getitem__) for column in columns)
+    distinct = [len(set(column)) == len(points) for column in columns]
+    return orders, distinct
+
+def split_subtree(points: list[Point], orders: Orders, distinct: list[bool]) -> tuple[int, list[Orders]]:
+    """
+        Picks the point that divides the rest of one subtree most evenly, and
+        partitions each of the subtree's orders stably around it. Returns the
+        split's index and the orders of its eight octants.
+        Along each axis a candidate leaves some points below it and the rest on
+        or above it; candidates are ranked by the larger of those two sides on
+        their worst axis, then on their second worst axis, then on their best
+        one, with ties going to the lowest index.
+        :complexity: O(S) where S is the size of the subtree
+    """
+    n = len(points)
+    size = len(orders[0])
+    if size == 1:
+        return orders[0][0], [([], [], []) for _ in range(8)]
+
+    below = []  # per axis, point index -> how many points of the subtree lie below it
+    for axis in range(3):
+        if distinct[axis]:
+            # Without repeated values, a point's position is exactly that count.
+            below.append(dict(zip(orders[axis], range(size))))
+            continue
+        counts, previous, first = {}, None, 0
+        for position, i in enumerate(orders[axis]):
+            value = points[i][axis]
+            if value != previous:
+                previous, first = value, position
+            counts[i] = first
+        below.append(counts)
+    below_x, below_y, below_z = below
+
+    def rank(i: int) -> int:
+        """ Orders candidates as described above, folded into one integer. """
+        a, b, c = below_x[i], below_y[i], below_z[i]
+        a, b, c = max(a, size - 1 - a), max(b, size - 1 - b), max(c, size - 1 - c)
+        worst, least = max(a, b, c), min(a, b, c)
+        return ((worst * size + a + b + c - worst - least) * size + least) * n + i
+
+    candidates = orders[0]
+    if size > PRUNE_ABOVE:
+        # The best split in the window around the x median bounds the worst
+        # side of the best split overall, ruling out every point whose x side
+        # alone is larger. The
+        # rest lie between the positions below, as below_x never decreases
+        # along x and never exceeds a point's own position.
+        middle = size // 2
+        window = size // MEDIAN_WINDOW
+        bound = min(map(rank, candidates[middle - window:middle + window + 1])) // (n * size * size)
+        stop = bound + 1
+        while stop < size and below_x[candidates[stop]] <= bound:
+            stop += 1
+        candidates = candidates[size - 1 - bound:stop]
+    split = min(map(rank, candidates)) % n
+
+    root_x, root_y, root_z = points[split]
+    octant_of = dict(zip(orders[0], [
+        (points[i][0] >= root_x) << 2 | (points[i][1] >= root_y) << 1 | (points[i][2] >= root_z)
+        for i in orders[0]
+    ]))
+    octant_of[split] = 8  # parks the split itself in a spare slot
+    children = [([], [], []) for _ in range(9)]
+    for axis in range(3):
+        appends = [child[axis].append for child in children]
+        for i in orders[axis]:
+            appends[octant_of[i]](i)
+    return split, children[:8]
+
+def balanced_layout(points: list[Point]) -> list[tuple[int, int, int]]:
+    """
+        Describes the balanced ThreeDeeBeeTree holding points without building it.
+        Returns one (index into points, octant within its parent, subtree size)
+        triple per node in pre-order; the root's octant is -1.
+        Each subtree's root is its most even splitting point.
+
+        The points are sorted along each axis once. Every subtree then carries
+        its indices in all three orders, and splitting it partitions each order
+        stably, so nothing is sorted again further down. Subtrees are worked
+        through on an explicit stack rather than by recursion.
+        :complexity: O(N log N) where N is the number of points, as the tree
+        has O(log N) levels and each costs O(N)
+    """
+    layout = []
+    if len(points) == 0:
+        return layout
+    orders, distinct = axis_orders(points)
+    stack = [(orders, -1)]
+    while stack:
+        orders, octant = stack.pop()
+        split, children = split_subtree(points, orders, distinct)
+        layout.append((split, octant, len(orders[0])))
+        # Pushed in reverse so the octants come off the stack in order.
+        for child_octant in range(7, -1, -1):
+            if len(children[child_octant][0]) > 0:
+                stack.append((children[child_octant], child_octant))
+    return layout
+
+def breadth_first_splits(points: list[Point], queue: deque[Orders], distinct: list[bool],
+                         stop_at: int | None = None) -> Iterator[int]:
+    """
+        Splits the subtrees waiting in queue in breadth-first order, yielding each
+        split's index as soon as it is chosen and queueing its octants. Stops once
+        queue is empty or holds stop_at subtrees, leaving those in it.
+        :complexity: O(N log N) where N is the number of points in queue
+    """
+    while len(queue) > 0 and (stop_at is None or len(queue) < stop_at):
+        split, children = split_subtree(points, queue.popleft(), distinct)
+        yield split
+        queue.extend(child for child in children if len(child[0]) > 0)
+
+def plan_ordering(points: list[Point]) -> array:
+    """
+        Worker half of iter_ordering: the breadth-first ordering of points as an
+        int64 array of indices into points.
+    """
+    orders, distinct = axis_orders(points)
+    return array('q', breadth_first_splits(points, deque([orders]), distinct))
+
+def iter_ordering(my_coordinate_list: list[Point], workers: int | None = None) -> Iterator[Point]:
+    """
+        Yields the points in an order as good as make_ordering's, but
+        breadth-first and each as soon as its subtree's split is chosen, so the
+        tree can be built while the ordering is still being worked out.
+
+        With workers > 1 the top levels are split here until there are about two
+        subtrees per worker. Those are ordered independently in a process pool,
+        and their orderings are interleaved, one point from each in turn, as
+        they come back.
+        :complexity: O(N log N) where N is the number of points
+    """
+    points = my_coordinate_list
+    if len(points) == 0:
+        return
+    orders, distinct = axis_orders(points)
+    queue = deque([orders])
+    parallel = workers is not None and workers > 1
+    for split in breadth_first_splits(points, queue, distinct, 2 * workers if parallel else None):
+        yield points[split]
+    if len(queue) == 0:
+        return
+
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        # Each subtree goes out in index order so ties are broken as they would be here.
+        subtrees = [sorted(subtree[0]) for subtree in queue]
+        pending = {pool.submit(plan_ordering, [points[i] for i in indices]): indices for indices in subtrees}
+        queue.clear()
+        running = []  # iterators over the points of each returned ordering
+        while len(pending) > 0 or len(running) > 0:
+            finished = [future for future in pending if future.done()]
+            if len(running) == 0 and len(finished) == 0:
+                finished = wait(pending, return_when=FIRST_COMPLETED).done
+            for future in finished:
+                indices = pending.pop(future)
+                running.append(map(points.__getitem__, map(indices.__getitem__, future.result())))
+            still_running = []
+            for ordering in running:
+                point = next(ordering, None)
+                if point is not None:
+                    yield point
+                    still_running.append(ordering)
+            running = still_running
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
 def make_ordering(my_coordinate_list: list[Point]) -> list[Point]:
-    raise NotImplementedError()
+    """
+        Orders the points so that inserting them into a ThreeDeeBeeTree in that
+        order keeps every node's octants within a 1:7 ratio along each axis.
+        Every subtree's splitting point comes before the rest of that subtree.
+        :complexity: O(N log N) where N is the number of points
+    """
+    return [my_coordinate_list[index] for index, _, _ in balanced_layout(my_coordinate_list)]
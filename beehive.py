@@ -1,5 +1,14 @@
+from __future__ import annotations
 from dataclasses import dataclass
+import heapq
+import os
+import struct
+import sys
+from array import array
+from itertools import count
+from threading import Lock
 from heap import MaxHeap
+from threedeebeetree import BeeNode, ThreeDeeBeeTree, Point, child_region, region_meets
 
 @dataclass
 class Beehive:
@@ -13,16 +22,605 @@ class Beehive:
     nutrient_factor: int
     volume: int = 0
 
+    def emeralds(self) -> int:
+        """ How many emeralds harvesting this hive right now would give. """
+        return min(self.capacity, self.volume) * self.nutrient_factor
+
+# Checkpoint files: a header of (magic, generation, hives, hives ever added), then
+# one record of (emeralds, order, x, y, z, capacity, nutrient_factor, volume) per
+# hive in the heap's array order.
+CHECKPOINT_HEADER = struct.Struct('<4sqqq')
+HIVE_RECORD = struct.Struct('<8q')
+# Harvest logs: a header of (magic, generation), then b'H' + (order, volume taken)
+# per harvest and b'A' + a hive record per hive added since the checkpoint.
+LOG_HEADER = struct.Struct('<4sq')
+HARVEST_RECORD = struct.Struct('<2q')
+
+
+def sync_directory(path: str):
+    """ Flushes path's directory entry to disk, so a rename into it survives a power loss. """
+    if os.name == 'posix':
+        directory = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+
+
+def write_durably(path: str, *chunks: bytes):
+    """
+        Replaces the file at path with the given chunks. They go to a temporary
+        file first, which is flushed to disk before it is renamed over path, so
+        even a power loss leaves path holding either all of the old contents or
+        all of the new.
+    """
+    with open(path + '.tmp', 'wb') as file:
+        for chunk in chunks:
+            file.write(chunk)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(path + '.tmp', path)
+    sync_directory(path)
+
+
+@dataclass
+class HiveNode(BeeNode):
+
+    # Largest (emeralds, order) of any hive in this node's subtree.
+    best: tuple[int, int] = (0, 0)
+
+
+class HiveTree(ThreeDeeBeeTree):
+    """
+        ThreeDeeBeeTree of (order, hive) items keyed by hive position, where
+        every node also caches the best (emeralds, order) found in its subtree.
+        Harvesting a hive only changes the caches along its search path, which
+        refresh_path brings up to date.
+    """
+
+    node_type = HiveNode
+
+    @staticmethod
+    def rank(current: HiveNode) -> tuple[int, int]:
+        order, hive = current.item
+        return hive.emeralds(), order
+
+    def refresh(self, current: HiveNode) -> None:
+        """ Recomputes current.best, trusting the caches of its children. """
+        ranks = [child.best for child in current.children if child is not None]
+        if current.live:
+            ranks.append(self.rank(current))
+        current.best = max(ranks, default=(0, 0))
+
+    def refresh_path(self, key: Point) -> None:
+        """
+            Brings every cache on the search path for key up to date, deepest first.
+            :complexity: O(D) where D is the depth of the tree
+        """
+        for current in reversed(self.search_path(key)):
+            self.refresh(current)
+
+    def insert_aux(self, key: Point, item: tuple[int, Beehive]) -> list[HiveNode]:
+        path = super().insert_aux(key, item)
+        for current in reversed(path):
+            self.refresh(current)
+        return path
+
+    def __delitem__(self, key: Point) -> None:
+        super().__delitem__(key)
+        self.refresh_path(key)
+
+    def build_from_layout(self, keys, items, layout) -> HiveNode | None:
+        """ Builds the subtree as ThreeDeeBeeTree does, then fills in its caches bottom-up. """
+        root = super().build_from_layout(keys, items, layout)
+        order = [] if root is None else [root]
+        for current in order:
+            order.extend(child for child in current.children if child is not None)
+        for current in reversed(order):
+            self.refresh(current)
+        return root
+
+    def best_in_box(self, lo: Point, hi: Point) -> HiveNode | None:
+        """
+            Returns the node of the best hive inside the box with corners lo and hi
+            (inclusive on every side), or None if there is none.
+            Octants are visited best cache first and skipped once they cannot beat
+            the best hive found so far; an octant wholly inside the box is never
+            searched, its cache already naming its best hive.
+            :complexity: O(B log B + D) where B is the number of visited nodes whose
+            regions straddle the boundary of the box and D is the depth of the tree
+        """
+        if self.root is None or self.root.subtree_size == 0 or not region_meets(self.bounds, lo, hi):
+            return None
+        found, found_rank = None, None
+        frontier = [(tuple(-value for value in self.root.best), self.root, self.bounds)]
+        while frontier:
+            _, current, region = heapq.heappop(frontier)
+            if found is not None and current.best <= found_rank:
+                break
+            if all(lo[axis] <= region[0][axis] and region[1][axis] <= hi[axis] for axis in range(3)):
+                # Follow the cache down to the node it came from.
+                while not current.live or self.rank(current) != current.best:
+                    current = next(child for child in current.children
+                                   if child is not None and child.best == current.best)
+                return current
+            key = current.key
+            if current.live and all(lo[axis] <= key[axis] <= hi[axis] for axis in range(3)):
+                rank = self.rank(current)
+                if found is None or rank > found_rank:
+                    found, found_rank = current, rank
+            for octant, child in enumerate(current.children):
+                # Subtrees whose nodes are all dead have no hive to follow the cache to.
+                if child is None or child.subtree_size == 0 or (found is not None and child.best <= found_rank):
+                    continue
+                sub_region = child_region(region, key, octant)
+                if region_meets(sub_region, lo, hi):
+                    heapq.heappush(frontier, (tuple(-value for value in child.best), child, sub_region))
+        return found
+
+
 class BeehiveSelector:
+    """
+        Keeps the beehives in a MaxHeap ordered by what harvesting them would give.
+        Heap entries are (emeralds, order, hive), where order is minus the number
+        of hives added before this one, so ties go to the hive added first.
+
+        Hives loaded by set_all_beehives_columnar or load stay in columns until
+        they could be the best: the heap then holds their index in place of a
+        Beehive, which is only made when the entry reaches the top. The rest
+        wait in a reserve, moved into the heap a batch of leaders at a time.
+
+        While a harvest log is open, use the selector in a with statement or
+        call close_log when done with it; each record is flushed to disk as it
+        is logged unless sync_log is False, in which case the last records
+        survive the process crashing but not a power loss.
 
-    def __init__(self, max_beehives: int):
-        raise NotImplementedError()
+        Regional queries go through a HiveTree over the same hives, built the
+        first time one is asked for. Harvesting through it leaves the hive's heap
+        entry overstating its emeralds; such entries are put right as they
+        reach the top of the heap.
+    """
+
+    # How many leaders go into the heap the first time; each later batch doubles.
+    FIRST_BATCH = 1024
+
+    def __init__(self, max_beehives: int, sync_log: bool = True):
+        self.max_beehives = max_beehives
+        self.heap = MaxHeap(max_beehives)
+        self.added = 0
+        self.spatial = None
+        self.log = None
+        self.sync_log = sync_log
+        self.reset_columns()
+
+    def __enter__(self) -> BeehiveSelector:
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close_log()
+
+    def reset_columns(self):
+        """ Forgets any hives loaded by set_all_beehives_columnar. """
+        self.columns = None  # (x, y, z, capacity, nutrient_factor, volume) arrays
+        self.reserve = None  # indices of the columnar hives not yet in the heap, ascending
+        self.reserve_yields = None
+        self.reserve_best = None  # (emeralds, order) of the best hive in the reserve
+        self.batch = self.FIRST_BATCH
 
     def set_all_beehives(self, hive_list: list[Beehive]):
-        raise NotImplementedError()
+        """
+            Replaces every hive being tracked with the ones in hive_list.
+            This stops any harvest log; dump again to start a new one.
+            :complexity: O(N log N) where N is len(hive_list)
+        """
+        self.heap = MaxHeap(self.max_beehives)
+        self.added = 0
+        self.spatial = None
+        self.close_log()
+        self.reset_columns()
+        for hive in hive_list:
+            self.add_beehive(hive)
+
+    def set_all_beehives_columnar(self, x, y, z, capacity, nutrient_factor, volume):
+        """
+            Replaces every hive being tracked with the hives described column-wise
+            by the given NumPy arrays, hive i being
+            Beehive(x[i], y[i], z[i], capacity[i], nutrient_factor[i], volume[i]).
+            Harvests then go exactly as after set_all_beehives on those hives,
+            and any harvest log is stopped likewise.
+            Every yield is worked out in one vectorised expression, and only the
+            leaders picked out by argpartition go into the heap.
+            :complexity: O(N) where N is the number of hives
+        """
+        import numpy as np  # only needed for columnar input
+
+        columns = tuple(np.asarray(column, dtype=np.int64) for column in (x, y, z, capacity, nutrient_factor, volume))
+        n = len(columns[0])
+        if any(column.shape != (n,) for column in columns):
+            raise ValueError('Expected one-dimensional columns of equal length')
+        if n > self.max_beehives:
+            raise IndexError('More beehives than max_beehives')
+        self.heap = MaxHeap(self.max_beehives)
+        self.spatial = None
+        self.close_log()
+        self.reset_columns()
+        self.added = n
+        if n == 0:
+            return
+        self.columns = columns
+        self.reserve = np.arange(n, dtype=np.int64)
+        self.reserve_yields = np.minimum(columns[3], columns[5]) * columns[4]
+        self.promote_leaders()
+
+    def promote_batch(self):
+        """
+            Moves the best hives of the reserve into the heap, at most self.batch
+            of them, and doubles self.batch.
+            :complexity: O(R + B) where R is the size of the reserve and B the batch
+        """
+        import numpy as np  # only needed for columnar input
+
+        remaining, yields = self.reserve, self.reserve_yields
+        size = min(len(remaining), self.batch)
+        self.batch *= 2
+        chosen = np.ones(len(remaining), dtype=bool)
+        if size < len(remaining):
+            threshold = yields[np.argpartition(yields, len(yields) - size)[len(yields) - size]]
+            chosen = yields > threshold
+            # Of the hives tied at the threshold, the ones added first win.
+            tied = np.flatnonzero(yields == threshold)
+            chosen[tied[:size - np.count_nonzero(chosen)]] = True
+        indices = remaining[chosen]
+        self.heap.heapify(list(zip(yields[chosen].tolist(), (-indices).tolist(), indices.tolist())))
+
+        self.reserve, self.reserve_yields = remaining[~chosen], yields[~chosen]
+        if len(self.reserve) == 0:
+            self.reserve = self.reserve_yields = self.reserve_best = None
+        else:
+            # argmax picks the first of any ties, which is the earliest added.
+            first = int(np.argmax(self.reserve_yields))
+            self.reserve_best = (int(self.reserve_yields[first]), -int(self.reserve[first]))
+
+    def promote_leaders(self):
+        """
+            Promotes batches until the top of the heap beats every hive left in
+            the reserve. Reserve hives are never harvested, so their yields hold.
+        """
+        while self.reserve is not None and (len(self.heap) == 0 or self.heap.peek_max()[:2] < self.reserve_best):
+            self.promote_batch()
+
+    def hive_at(self, ref) -> Beehive:
+        """ Returns the hive a heap entry refers to, making it from the columns if it is an index. """
+        if isinstance(ref, Beehive):
+            return ref
+        return Beehive(*(int(column[ref]) for column in self.columns))
     
     def add_beehive(self, hive: Beehive):
-        raise NotImplementedError()
+        """
+            :complexity: O(log N) where N is the number of hives
+        """
+        # Hives waiting in the reserve count towards max_beehives too.
+        if len(self.heap) + (0 if self.reserve is None else len(self.reserve)) >= self.max_beehives:
+            raise IndexError('More beehives than max_beehives')
+        if self.spatial is not None:
+            self.spatial[(hive.x, hive.y, hive.z)] = (-self.added, hive)
+        entry = (hive.emeralds(), -self.added, hive)
+        self.heap.add(entry)
+        self.added += 1
+        self.log_record(b'A' + HIVE_RECORD.pack(*self.record(entry)))
+
+    def pop_best(self) -> tuple[int, int, Beehive]:
+        """
+            Removes and returns the heap entry of the best hive, first putting
+            right any entries found overstating their hive's emeralds and
+            promoting leaders from the reserve as needed.
+            :complexity: O(S log N) where S is the number of such entries
+            and N is the number of hives
+        """
+        while True:
+            self.promote_leaders()
+            emeralds, order, ref = self.heap.get_max()
+            hive = self.hive_at(ref)
+            if emeralds == hive.emeralds():
+                return emeralds, order, hive
+            self.heap.add((hive.emeralds(), order, hive))
+
+    def take(self, order: int, hive: Beehive, taken: int):
+        """ Takes volume out of a hive, logging the harvest if a log is open. """
+        hive.volume -= taken
+        if taken > 0:
+            self.log_record(b'H' + HARVEST_RECORD.pack(order, taken))
+
+    def log_record(self, data: bytes):
+        """ Appends a record to the harvest log, if one is open, flushing it to disk if sync_log is set. """
+        if self.log is not None:
+            self.log.write(data)
+            if self.sync_log:
+                os.fsync(self.log.fileno())
+
+    @staticmethod
+    def record(entry: tuple[int, int, Beehive]) -> tuple[int, ...]:
+        """ The checkpoint record of a heap entry holding a Beehive. """
+        emeralds, order, hive = entry
+        return emeralds, order, hive.x, hive.y, hive.z, hive.capacity, hive.nutrient_factor, hive.volume
+
+    def dump(self, path: str):
+        """
+            Writes every hive, with its entry, to a checkpoint at path in the
+            heap's array order, then starts an empty harvest log at path + '.log'.
+            Both files share a fresh generation number, so a crash between the
+            two writes leaves an old log that load knows to ignore. Each is
+            written to disk in full before it replaces the file before it.
+            :complexity: O(N) where N is the number of hives
+        """
+        while self.reserve is not None:
+            self.promote_batch()
+        generation = int.from_bytes(os.urandom(7), 'little')
+        entries = self.heap.entries()
+        # The fields of each hive still in columns, by its index there.
+        rows = [] if self.columns is None else list(zip(*(column.tolist() for column in self.columns)))
+        records = array('q')
+        for entry in entries:
+            if isinstance(entry[2], Beehive):
+                records.extend(self.record(entry))
+            else:
+                records.extend(entry[:2] + rows[entry[2]])
+        if sys.byteorder == 'big':
+            records.byteswap()
+        write_durably(path, CHECKPOINT_HEADER.pack(b'BHVC', generation, len(entries), self.added),
+                      records.tobytes())
+        self.close_log()
+        write_durably(path + '.log', LOG_HEADER.pack(b'BHVL', generation))
+        self.log = open(path + '.log', 'ab', buffering=0)
+
+    def load(self, path: str):
+        """
+            Replaces every hive being tracked with those checkpointed at path.
+            The heap's array is restored as it was dumped, with no heapifying;
+            the hives themselves stay in columns, as after
+            set_all_beehives_columnar, until they reach the top of the heap.
+            A log of what happened since the checkpoint is then replayed and
+            logging carries on in it. A record cut short by a crash at the end
+            of the log is dropped.
+            :complexity: O(N + L log N) where N is the number of hives and L
+            the number of records in the log
+        """
+        with open(path, 'rb') as checkpoint:
+            data = checkpoint.read()
+        magic, generation, length, added = CHECKPOINT_HEADER.unpack_from(data)
+        if magic != b'BHVC':
+            raise ValueError('Not a beehive checkpoint: {0}'.format(path))
+        if length > self.max_beehives:
+            raise IndexError('More beehives than max_beehives')
+        records = array('q')
+        records.frombytes(data[CHECKPOINT_HEADER.size:CHECKPOINT_HEADER.size + length * HIVE_RECORD.size])
+        if sys.byteorder == 'big':
+            records.byteswap()
+        self.heap = MaxHeap(self.max_beehives)
+        self.spatial = None
+        self.close_log()
+        self.reset_columns()
+        self.added = added
+        self.columns = tuple(records[field::8] for field in range(2, 8))
+        self.heap.restore(list(zip(records[0::8], records[1::8], range(length))))
+
+        log_path = path + '.log'
+        try:
+            with open(log_path, 'rb') as log:
+                data = log.read()
+        except FileNotFoundError:
+            data = b''
+        if len(data) < LOG_HEADER.size or LOG_HEADER.unpack_from(data) != (b'BHVL', generation):
+            # No log, or one left over from an older checkpoint.
+            write_durably(log_path, LOG_HEADER.pack(b'BHVL', generation))
+        elif len(data) > LOG_HEADER.size:
+            end = self.replay(data, LOG_HEADER.size)
+            if end < len(data):
+                os.truncate(log_path, end)
+        self.log = open(log_path, 'ab', buffering=0)
+        if self.sync_log:
+            os.fsync(self.log.fileno())
+
+    def replay(self, data: bytes, position: int) -> int:
+        """
+            Applies the logged harvests and added hives in data from position on,
+            returning where the last whole record ends. Harvested hives keep
+            entries overstating them, put right as they reach the top.
+            :complexity: O(N + L log N) where N is the number of hives and L
+            the number of records
+        """
+        refs = {order: ref for _, order, ref in self.heap.entries()}
+        volumes = self.columns[5]
+        while position < len(data):
+            kind = data[position:position + 1]
+            if kind not in (b'H', b'A'):
+                raise ValueError('Corrupt harvest log')
+            size = HARVEST_RECORD.size if kind == b'H' else HIVE_RECORD.size
+            if position + 1 + size > len(data):
+                break
+            if kind == b'H':
+                order, taken = HARVEST_RECORD.unpack_from(data, position + 1)
+                ref = refs[order]
+                if isinstance(ref, Beehive):
+                    ref.volume -= taken
+                else:
+                    volumes[ref] -= taken
+            else:
+                record = HIVE_RECORD.unpack_from(data, position + 1)
+                hive = Beehive(*record[2:])
+                self.heap.add((hive.emeralds(), record[1], hive))
+                refs[record[1]] = hive
+                self.added += 1
+            position += 1 + size
+        return position
+
+    def close_log(self):
+        """ Stops logging harvests, if they were being logged. """
+        if self.log is not None:
+            self.log.close()
+            self.log = None
+
+    def refresh_spatial(self, hive: Beehive):
+        """ Tells the spatial index, if any, that hive has been harvested. """
+        if self.spatial is not None:
+            self.spatial.refresh_path((hive.x, hive.y, hive.z))
+
+    def spatial_index(self) -> HiveTree:
+        """
+            Returns the HiveTree over every hive, building it if needed.
+            Hives must then all sit at different positions. Any hives still in
+            columns are all made into Beehives first.
+            :complexity: O(N log² N) the first time, where N is the number of hives
+        """
+        if self.spatial is None:
+            while self.reserve is not None:
+                self.promote_batch()
+            entries = [(emeralds, order, self.hive_at(ref))
+                       for emeralds, order, ref in self.heap.entries()]
+            self.heap = MaxHeap(self.max_beehives)
+            self.heap.heapify(entries)
+            self.spatial = HiveTree.from_points(
+                [(hive.x, hive.y, hive.z) for _, _, hive in entries],
+                [(order, hive) for _, order, hive in entries],
+            )
+        return self.spatial
     
     def harvest_best_beehive(self):
-        raise NotImplementedError()
+        """
+            Harvests the hive giving the most emeralds, returning how many it gave.
+            :complexity: O(log N) where N is the number of hives
+        """
+        emeralds, order, hive = self.pop_best()
+        self.take(order, hive, min(hive.capacity, hive.volume))
+        self.heap.add((hive.emeralds(), order, hive))
+        self.refresh_spatial(hive)
+        return emeralds
+
+    def harvest_many(self, n: int):
+        """
+            Harvests n times, exactly as n calls to harvest_best_beehive would,
+            returning the total emeralds given.
+            The best hive keeps winning until its entry drops below the runner-up,
+            which it can only do once its volume falls under its capacity, so all
+            of its full-capacity harvests are applied at once.
+            :complexity: O(L log N) where L is the number of times the best hive
+            changes and N is the number of hives
+        """
+        total = 0
+        while n > 0:
+            _, order, hive = self.pop_best()
+            while True:
+                if hive.capacity > 0 and hive.volume >= hive.capacity:
+                    harvests = min(n, hive.volume // hive.capacity)
+                    taken = harvests * hive.capacity
+                else:
+                    taken = min(hive.capacity, hive.volume)
+                    # Taking nothing changes nothing, so the hive wins every harvest left.
+                    harvests = 1 if taken > 0 else n
+                self.take(order, hive, taken)
+                total += taken * hive.nutrient_factor
+                n -= harvests
+                entry = (hive.emeralds(), order, hive)
+                if n == 0:
+                    break
+                # An overstated runner-up only makes this stop early.
+                self.promote_leaders()
+                if len(self.heap) > 0 and entry[:2] < self.heap.peek_max()[:2]:
+                    break
+            self.heap.add(entry)
+            self.refresh_spatial(hive)
+        return total
+
+    def harvest_best_in_box(self, lo: Point, hi: Point):
+        """
+            Harvests the best hive inside the box with corners lo and hi (inclusive
+            on every side), returning how many emeralds it gave.
+            Ties go to the hive added first, as in harvest_best_beehive.
+            :raises IndexError: if no hive lies inside the box
+            :complexity: O(B log B + D) where B is the number of visited nodes whose
+            regions straddle the boundary of the box and D is the depth of the tree
+        """
+        best = self.spatial_index().best_in_box(lo, hi)
+        if best is None:
+            raise IndexError('No beehive in box')
+        order, hive = best.item
+        emeralds = hive.emeralds()
+        self.take(order, hive, min(hive.capacity, hive.volume))
+        self.spatial.refresh_path(best.key)
+        return emeralds
+
+    def best_near(self, point: Point, k: int) -> Beehive | None:
+        """
+            Returns the best hive among the k hives closest to point, without
+            harvesting it, or None if there are no hives.
+            :complexity: O((V + k) log V) where V is the number of nodes visited
+        """
+        closest = self.spatial_index().nearest(point, k)
+        if len(closest) == 0:
+            return None
+        return max((hive.emeralds(), order, hive) for _, (order, hive) in closest)[2]
+
+
+class ShardedBeehiveSelector:
+    """
+        BeehiveSelector for several harvesting threads at once. Hives are dealt
+        round-robin across shards, each a MaxHeap of (emeralds, order, hive)
+        entries behind its own lock, so threads touching different shards never
+        wait on each other. A harvest runs a tournament over the shard tops and
+        harvests the winning shard's best hive under that shard's lock.
+
+        Used from one thread, harvests go exactly as with BeehiveSelector. While
+        other threads harvest too, a shard's top can change after the tournament,
+        so a harvest may take a hive that was only close to the best; no hive is
+        ever harvested by two threads at once.
+    """
+
+    def __init__(self, max_beehives: int, shards: int = 8):
+        self.max_beehives = max_beehives
+        self.shards = shards
+        self.set_all_beehives([])
+
+    def set_all_beehives(self, hive_list: list[Beehive]):
+        """
+            Replaces every hive being tracked with the ones in hive_list.
+            Must not run alongside any other call.
+            :complexity: O(N log N) where N is len(hive_list)
+        """
+        shard_size = -(-self.max_beehives // self.shards)
+        self.heaps = [MaxHeap(shard_size) for _ in range(self.shards)]
+        self.locks = [Lock() for _ in range(self.shards)]
+        self.orders = count()  # next() on it is atomic, so no lock is needed
+        for hive in hive_list:
+            self.add_beehive(hive)
+
+    def add_beehive(self, hive: Beehive):
+        """
+            :complexity: O(log N) where N is the number of hives
+        """
+        order = next(self.orders)
+        shard = order % self.shards
+        with self.locks[shard]:
+            self.heaps[shard].add((hive.emeralds(), -order, hive))
+
+    def shard_top(self, shard: int) -> tuple[int, int] | None:
+        """ (emeralds, order) of the best hive in the shard, or None if it is empty. """
+        with self.locks[shard]:
+            heap = self.heaps[shard]
+            return heap.peek_max()[:2] if len(heap) > 0 else None
+
+    def harvest_best_beehive(self):
+        """
+            Harvests the hive giving the most emeralds, returning how many it gave.
+            :raises IndexError: if there are no hives
+            :complexity: O(S + log N) where S is the number of shards and N is
+            the number of hives
+        """
+        tops = [(top, shard) for shard, top in enumerate(map(self.shard_top, range(self.shards))) if top is not None]
+        if len(tops) == 0:
+            raise IndexError('No beehives')
+        _, shard = max(tops)
+        with self.locks[shard]:
+            emeralds, order, hive = self.heaps[shard].get_max()
+            hive.volume -= min(hive.capacity, hive.volume)
+            self.heaps[shard].add((hive.emeralds(), order, hive))
+        return emeralds
@@ -0,0 +1 @@
+""" Timing scripts for the data structures, run as ``python -m benchmarks.<name>``. """
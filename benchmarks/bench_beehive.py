@@ -0,0 +1,93 @@
+""" BeehiveSelector loading: set_all_beehives against set_all_beehives_columnar
+    and against restoring a checkpoint, and harvest throughput of several threads sharing one selector behind a
+    global lock against a ShardedBeehiveSelector.
+
+    Usage: python -m benchmarks.bench_beehive [--sizes 100000 1000000] [--threads 1 4 8]
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from beehive import Beehive, BeehiveSelector, ShardedBeehiveSelector
+
+
+def random_columns(n: int, rng: np.random.Generator) -> list:
+    """ x, y, z, capacity, nutrient_factor and volume of n random hives. """
+    return [rng.integers(0, 10 ** 6, n) for _ in range(3)] + [
+        rng.integers(0, 50, n), rng.integers(0, 10, n), rng.integers(0, 500, n)]
+
+
+def timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def run(n: int, harvests: int, seed: int) -> None:
+    columns = random_columns(n, np.random.default_rng(seed))
+    print('n = {0}'.format(n))
+
+    by_list, by_columns = BeehiveSelector(n), BeehiveSelector(n)
+    hives = [Beehive(*values) for values in zip(*(column.tolist() for column in columns))]
+    print('  load  list    {0:8.3f}s'.format(timed(lambda: by_list.set_all_beehives(hives))))
+    print('  load  columns {0:8.3f}s'.format(timed(lambda: by_columns.set_all_beehives_columnar(*columns))))
+    print('  harvest_many({0}) list {1:.3f}s  columns {2:.3f}s'.format(
+        harvests, timed(lambda: by_list.harvest_many(harvests)), timed(lambda: by_columns.harvest_many(harvests))))
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'hives')
+        print('  dump          {0:8.3f}s'.format(timed(lambda: by_list.dump(path))))
+        by_list.harvest_many(harvests)
+        by_list.close_log()
+        restored = BeehiveSelector(n)
+        print('  load + {0} logged harvests {1:8.3f}s'.format(harvests, timed(lambda: restored.load(path))))
+        restored.close_log()
+
+
+def throughput(harvest, threads: int, harvests: int) -> float:
+    """ Harvests per second with each of the threads calling harvest() harvests times. """
+    def worker():
+        for _ in range(harvests):
+            harvest()
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return threads * harvests / (time.perf_counter() - start)
+
+
+def run_threaded(n: int, threads: int, harvests: int, seed: int) -> None:
+    columns = [column.tolist() for column in random_columns(n, np.random.default_rng(seed))]
+    locked, lock = BeehiveSelector(n), threading.Lock()
+    locked.set_all_beehives([Beehive(*values) for values in zip(*columns)])
+    sharded = ShardedBeehiveSelector(n, shards=2 * threads)
+    sharded.set_all_beehives([Beehive(*values) for values in zip(*columns)])
+
+    def locked_harvest():
+        with lock:
+            locked.harvest_best_beehive()
+
+    print('  {0} threads  global lock {1:10.0f}/s  sharded {2:10.0f}/s'.format(
+        threads, throughput(locked_harvest, threads, harvests),
+        throughput(sharded.harvest_best_beehive, threads, harvests)))
+
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser()
+    p.add_argument('--sizes', type=int, nargs='+', default=[10 ** 5, 10 ** 6])
+    p.add_argument('--harvests', type=int, default=10 ** 5)
+    p.add_argument('--threads', type=int, nargs='+', default=[1, 4, 8])
+    p.add_argument('--seed', type=int, default=1234)
+    args = p.parse_args()
+
+    for size in args.sizes:
+        run(size, args.harvests, args.seed)
+        for threads in args.threads:
+            run_threaded(size, threads, args.harvests // threads, args.seed)
@@ -0,0 +1,76 @@
+""" ThreeDeeBeeTree.build_parallel against from_points, with the share of the
+    parallel build that stays serial in the calling process.
+
+    The serial share is the top levels split by split_top_levels plus grafting
+    the workers' layouts in, and bounds the speedup any number of workers can
+    give: at most total / serial.
+
+    Usage: python -m benchmarks.bench_build_parallel [--sizes 200000] [--workers 2 4 8]
+"""
+import argparse
+import os
+import random
+import time
+
+from balancing import balanced_layout
+from threedeebeetree import ThreeDeeBeeTree, OCTANTS, gc_paused
+
+SPREAD = 10 ** 6
+
+
+def random_points(n: int, rng: random.Random) -> list:
+    points = set()
+    while len(points) < n:
+        points.add((rng.randrange(SPREAD), rng.randrange(SPREAD), rng.randrange(SPREAD)))
+    return list(points)
+
+
+def seconds(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def serial_share(points: list, workers: int) -> tuple:
+    """ Seconds build_parallel spends splitting the top levels and grafting, as it would with workers. """
+    items = [None] * len(points)
+    levels = 1
+    while OCTANTS ** levels < 2 * workers:
+        levels += 1
+    tree = ThreeDeeBeeTree()
+    with gc_paused():
+        start = time.perf_counter()
+        tasks = tree.split_top_levels(points, items, levels)
+        split_time = time.perf_counter() - start
+
+        layouts = [balanced_layout([points[i] for i in indices]) for _, _, indices in tasks]
+        start = time.perf_counter()
+        for (parent, octant, indices), layout in zip(tasks, layouts):
+            parent.children[octant] = tree.build_from_layout(
+                [points[i] for i in indices], [items[i] for i in indices], layout)
+        return split_time, time.perf_counter() - start
+
+
+def run(n: int, workers: list, seed: int) -> None:
+    points = random_points(n, random.Random(seed))
+    serial = seconds(lambda: ThreeDeeBeeTree.from_points(points))
+    print('n = {0} ({1} cores)'.format(n, os.cpu_count()))
+    print('  from_points {0:.3f}s'.format(serial))
+    for count in workers:
+        parallel = seconds(lambda: ThreeDeeBeeTree.build_parallel(points, workers=count))
+        split_time, graft_time = serial_share(points, count)
+        print('  build_parallel workers={0}: {1:.3f}s  speedup {2:.2f}x  '
+              'serial: top levels {3:.3f}s + grafting {4:.3f}s, bounding the speedup by {5:.1f}x'.format(
+                  count, parallel, serial / parallel, split_time, graft_time,
+                  serial / (split_time + graft_time)))
+
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser()
+    p.add_argument('--sizes', type=int, nargs='+', default=[2 * 10 ** 5])
+    p.add_argument('--workers', type=int, nargs='+', default=[2, 4, 8])
+    p.add_argument('--seed', type=int, default=1234)
+    args = p.parse_args()
+
+    for size in args.sizes:
+        run(size, args.workers, args.seed)
@@ -0,0 +1,54 @@
+""" FingerBinarySearchTree against BinarySearchTree on sequential and random lookups.
+
+    Usage: python -m benchmarks.bench_finger_bst [--sizes 10000 100000]
+"""
+import argparse
+import random
+import time
+
+from bst import BinarySearchTree
+from finger_bst import FingerBinarySearchTree
+
+
+def filled(tree, keys: list):
+    for key in keys:
+        tree[key] = key
+    return tree
+
+
+def timed(tree, queries: list) -> float:
+    """ Mean seconds per lookup of each query in turn. """
+    start = time.perf_counter()
+    for key in queries:
+        tree[key]
+    return (time.perf_counter() - start) / len(queries)
+
+
+def run(n: int, seed: int) -> None:
+    rng = random.Random(seed)
+    keys = list(range(n))
+    rng.shuffle(keys)
+    plain, finger = filled(BinarySearchTree(), keys), filled(FingerBinarySearchTree(), keys)
+
+    walk, position = [], n // 2
+    for _ in range(n):
+        position = min(n - 1, max(0, position + rng.randint(-8, 8)))
+        walk.append(position)
+    streams = [
+        ('sequential', list(range(n))),
+        ('random walk', walk),
+        ('random', [rng.randrange(n) for _ in range(n)]),
+    ]
+    print('n = {0}'.format(n))
+    for name, queries in streams:
+        print('  {0:<12} plain {1:.2e}s  finger {2:.2e}s'.format(name, timed(plain, queries), timed(finger, queries)))
+
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser()
+    p.add_argument('--sizes', type=int, nargs='+', default=[10 ** 4, 10 ** 5])
+    p.add_argument('--seed', type=int, default=1234)
+    args = p.parse_args()
+
+    for size in args.sizes:
+        run(size, args.seed)
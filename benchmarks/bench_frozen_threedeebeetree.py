@@ -0,0 +1,62 @@
+""" Batch lookups on a FrozenThreeDeeBeeTree against looking the same points
+    up one at a time in the ThreeDeeBeeTree it was frozen from.
+
+    Half of the queries are in the tree and half are not.
+
+    Usage: python -m benchmarks.bench_frozen_threedeebeetree [--sizes 100000 1000000]
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from threedeebeetree import ThreeDeeBeeTree
+
+SPREAD = 10 ** 6
+
+
+def random_points(n: int, rng: random.Random) -> list:
+    points = set()
+    while len(points) < n:
+        points.add((rng.randrange(SPREAD), rng.randrange(SPREAD), rng.randrange(SPREAD)))
+    return list(points)
+
+
+def best_of(func, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(n: int, repeat: int, seed: int) -> None:
+    points = random_points(2 * n, random.Random(seed))
+    tdbt = ThreeDeeBeeTree.from_points(points[:n], list(range(n)))
+    frozen = tdbt.freeze()
+    queries = points[n // 2:n + n // 2]
+    batch = np.array(queries, dtype=np.int64)
+
+    print('n = {0}, depth {1}'.format(n, frozen.depth))
+    loop = best_of(lambda: [point in tdbt for point in queries], repeat)
+    vectorised = best_of(lambda: frozen.contains_many(batch), repeat)
+    print('  contains: loop {0:.4f}s  contains_many {1:.4f}s  speedup {2:.1f}x'.format(
+        loop, vectorised, loop / vectorised))
+    present, present_batch = queries[:n // 2], batch[:n // 2]
+    loop = best_of(lambda: [tdbt[point] for point in present], repeat)
+    vectorised = best_of(lambda: frozen.get_many(present_batch), repeat)
+    print('  get:      loop {0:.4f}s  get_many      {1:.4f}s  speedup {2:.1f}x'.format(
+        loop, vectorised, loop / vectorised))
+
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser()
+    p.add_argument('--sizes', type=int, nargs='+', default=[10 ** 5, 10 ** 6])
+    p.add_argument('--repeat', type=int, default=3)
+    p.add_argument('--seed', type=int, default=1234)
+    args = p.parse_args()
+
+    for size in args.sizes:
+        run(size, args.repeat, args.seed)
@@ -0,0 +1,100 @@
+""" MortonIndex against ThreeDeeBeeTree: build time, memory and query latency.
+
+    Usage: python -m benchmarks.bench_morton [--sizes 100000 1000000]
+"""
+import argparse
+import random
+import time
+import tracemalloc
+
+from morton import MortonIndex, OFFSET
+from threedeebeetree import ThreeDeeBeeTree
+
+
+def random_points(n: int, rng: random.Random) -> list:
+    points = set()
+    while len(points) < n:
+        points.add(tuple(rng.randrange(-OFFSET, OFFSET) for _ in range(3)))
+    return list(points)
+
+
+def measure_build(build):
+    """
+        Returns (result, seconds, bytes held by the result) for build().
+        Memory is traced in a second build, since tracing slows the first down.
+    """
+    start = time.perf_counter()
+    result = build()
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    traced = build()
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del traced
+    return result, seconds, allocated
+
+
+def inserted_tree(points: list):
+    tdbt = ThreeDeeBeeTree()
+    for i, point in enumerate(points):
+        tdbt[point] = i
+    return tdbt
+
+
+def inserted_index(points: list):
+    index = MortonIndex()
+    for i, point in enumerate(points):
+        index[point] = i
+    return index
+
+
+def timed(func, queries: list) -> float:
+    """ Mean seconds per call of func over the queries. """
+    start = time.perf_counter()
+    for query in queries:
+        func(query)
+    return (time.perf_counter() - start) / len(queries)
+
+
+def run(n: int, queries: int, seed: int) -> None:
+    rng = random.Random(seed)
+    points = random_points(n, rng)
+    items = list(range(n))
+    print('n = {0}'.format(n))
+
+    builds = [
+        ('ThreeDeeBeeTree inserts', lambda: inserted_tree(points)),
+        ('ThreeDeeBeeTree.from_points', lambda: ThreeDeeBeeTree.from_points(points, items)),
+        ('MortonIndex inserts', lambda: inserted_index(points)),
+        ('MortonIndex.from_points', lambda: MortonIndex.from_points(points, items)),
+    ]
+    built = {}
+    for name, build in builds:
+        built[name], seconds, allocated = measure_build(build)
+        print('  build {0:<28} {1:8.3f}s {2:8.1f} MiB'.format(name, seconds, allocated / 2 ** 20))
+
+    tdbt, index = built['ThreeDeeBeeTree.from_points'], built['MortonIndex.from_points']
+    lookups = rng.sample(points, min(queries * 100, n))
+    print('  lookup   tree {0:.2e}s  morton {1:.2e}s'.format(
+        timed(tdbt.__getitem__, lookups), timed(index.__getitem__, lookups)))
+    for fraction in (0.0001, 0.01):
+        side = int(2 * OFFSET * fraction ** (1 / 3))
+        boxes = []
+        for _ in range(queries):
+            lo = tuple(rng.randrange(-OFFSET, OFFSET - side) for _ in range(3))
+            boxes.append((lo, tuple(coordinate + side for coordinate in lo)))
+        print('  box ~{0:.2%}  tree {1:.2e}s  morton {2:.2e}s'.format(
+            fraction,
+            timed(lambda box: sum(1 for _ in tdbt.query_box(*box)), boxes),
+            timed(lambda box: sum(1 for _ in index.query_box(*box)), boxes)))
+
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser()
+    p.add_argument('--sizes', type=int, nargs='+', default=[10 ** 5, 10 ** 6])
+    p.add_argument('--queries', type=int, default=100)
+    p.add_argument('--seed', type=int, default=1234)
+    args = p.parse_args()
+
+    for size in args.sizes:
+        run(size, args.queries, args.seed)
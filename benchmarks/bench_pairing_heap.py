@@ -0,0 +1,74 @@
+""" Combining per-worker heaps into one: MaxHeap by popping and re-adding
+    against PairingMaxHeap.merge, then draining the combined heap.
+
+    Usage: python -m benchmarks.bench_pairing_heap [--sizes 100000 1000000] [--workers 8]
+"""
+import argparse
+import random
+import time
+
+from heap import MaxHeap
+from pairing_heap import PairingMaxHeap
+
+
+def timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def fill(heaps: list, chunks: list) -> None:
+    for heap, chunk in zip(heaps, chunks):
+        for value in chunk:
+            heap.add(value)
+
+
+def drain(heap) -> None:
+    while len(heap) > 0:
+        heap.get_max()
+
+
+def combine_array_heaps(heaps: list, n: int) -> MaxHeap:
+    combined = MaxHeap(n)
+    for heap in heaps:
+        while len(heap) > 0:
+            combined.add(heap.get_max())
+    return combined
+
+
+def combine_pairing_heaps(heaps: list) -> PairingMaxHeap:
+    combined = PairingMaxHeap()
+    for heap in heaps:
+        combined.merge(heap)
+    return combined
+
+
+def run(n: int, workers: int, seed: int) -> None:
+    rng = random.Random(seed)
+    values = [rng.random() for _ in range(n)]
+    chunks = [values[i::workers] for i in range(workers)]
+    print('n = {0}, {1} workers'.format(n, workers))
+
+    array_heaps = [MaxHeap(len(chunk)) for chunk in chunks]
+    pairing_heaps = [PairingMaxHeap() for _ in chunks]
+    print('  fill     array {0:8.3f}s  pairing {1:8.3f}s'.format(
+        timed(lambda: fill(array_heaps, chunks)), timed(lambda: fill(pairing_heaps, chunks))))
+
+    start = time.perf_counter()
+    combined_array = combine_array_heaps(array_heaps, n)
+    middle = time.perf_counter()
+    combined_pairing = combine_pairing_heaps(pairing_heaps)
+    print('  combine  array {0:8.3f}s  pairing {1:8.3f}s'.format(middle - start, time.perf_counter() - middle))
+    print('  drain    array {0:8.3f}s  pairing {1:8.3f}s'.format(
+        timed(lambda: drain(combined_array)), timed(lambda: drain(combined_pairing))))
+
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser()
+    p.add_argument('--sizes', type=int, nargs='+', default=[10 ** 5, 10 ** 6])
+    p.add_argument('--workers', type=int, default=8)
+    p.add_argument('--seed', type=int, default=1234)
+    args = p.parse_args()
+
+    for size in args.sizes:
+        run(size, args.workers, args.seed)
@@ -0,0 +1,79 @@
+""" Spatial queries on a ThreeDeeBeeTree: nearest-neighbour and radius search
+    against brute force, and count_box against counting query_box's output.
+
+    Usage: python -m benchmarks.bench_threedeebeetree [--sizes 100000 1000000]
+"""
+import argparse
+import random
+import time
+
+from threedeebeetree import ThreeDeeBeeTree, distance_squared
+
+SPREAD = 10 ** 6
+
+
+def random_points(n: int, rng: random.Random) -> list:
+    points = set()
+    while len(points) < n:
+        points.add((rng.randrange(SPREAD), rng.randrange(SPREAD), rng.randrange(SPREAD)))
+    return list(points)
+
+
+def brute_nearest(points: list, target, k: int) -> list:
+    return sorted(points, key=lambda point: distance_squared(point, target))[:k]
+
+
+def brute_within_radius(points: list, target, r: float) -> list:
+    limit = r * r
+    return [point for point in points if distance_squared(point, target) <= limit]
+
+
+def timed(func, queries: list) -> float:
+    """ Mean seconds per call of func over the queries. """
+    start = time.perf_counter()
+    for query in queries:
+        func(query)
+    return (time.perf_counter() - start) / len(queries)
+
+
+def run(n: int, queries: int, k: int, radius: float, seed: int) -> None:
+    rng = random.Random(seed)
+    points = random_points(n, rng)
+    tdbt = ThreeDeeBeeTree()
+    for i, point in enumerate(points):
+        tdbt[point] = i
+    targets = [(rng.randrange(SPREAD), rng.randrange(SPREAD), rng.randrange(SPREAD)) for _ in range(queries)]
+    brute_targets = targets[:max(1, queries // 10)]
+
+    print('n = {0}'.format(n))
+    for fraction in (0.01, 0.1, 0.5):
+        side = int(SPREAD * fraction ** (1 / 3))
+        boxes = []
+        for target in targets:
+            lo = tuple(min(coord, SPREAD - side) for coord in target)
+            boxes.append((lo, tuple(coord + side for coord in lo)))
+        count_time = timed(lambda box: tdbt.count_box(*box), boxes)
+        scan_time = timed(lambda box: sum(1 for _ in tdbt.query_box(*box)), boxes[:max(1, queries // 10)])
+        print('  box holding ~{0:.0%}: count_box {1:.6f}s  query_box {2:.6f}s  speedup {3:.1f}x'.format(
+            fraction, count_time, scan_time, scan_time / count_time))
+    tree_time = timed(lambda target: tdbt.nearest(target, k), targets)
+    brute_time = timed(lambda target: brute_nearest(points, target, k), brute_targets)
+    print('  nearest k={0}: tree {1:.6f}s  brute {2:.6f}s  speedup {3:.1f}x'.format(
+        k, tree_time, brute_time, brute_time / tree_time))
+    tree_time = timed(lambda target: tdbt.within_radius(target, radius), targets)
+    brute_time = timed(lambda target: brute_within_radius(points, target, radius), brute_targets)
+    print('  within r={0}: tree {1:.6f}s  brute {2:.6f}s  speedup {3:.1f}x'.format(
+        radius, tree_time, brute_time, brute_time / tree_time))
+
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser()
+    p.add_argument('--sizes', type=int, nargs='+', default=[10 ** 5, 10 ** 6])
+    p.add_argument('--queries', type=int, default=200)
+    p.add_argument('-k', type=int, default=10)
+    p.add_argument('--radius', type=float, default=20000)
+    p.add_argument('--seed', type=int, default=1234)
+    args = p.parse_args()
+
+    for size in args.sizes:
+        run(size, args.queries, args.k, args.radius, args.seed)
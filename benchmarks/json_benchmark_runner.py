@@ -0,0 +1,49 @@
+""" Reports benchmark results as JSON, after the fashion of ed_utils.json_test_runner. """
+from __future__ import annotations
+import json
+import sys
+
+
+class JSONBenchmarkRunner(object):
+    """
+        Runs benchmarks and writes their results to stream in JSON form.
+
+        Given the results of an earlier run as a baseline, every benchmark also
+        present there is compared against it, and counts as a regression once
+        it takes more than (1 + tolerance) times as long.
+    """
+
+    def __init__(self, stream=sys.stdout, baseline: dict | None = None, tolerance: float = 0.25):
+        self.stream = stream
+        self.baseline = {}
+        if baseline is not None:
+            self.baseline = {self.key(result): result for result in baseline["benchmarks"]}
+        self.tolerance = tolerance
+        self.json_data = {
+            "benchmarks": [],
+        }
+
+    @staticmethod
+    def key(result: dict) -> tuple[str, str, int]:
+        return result["name"], result["distribution"], result["size"]
+
+    def compare(self, result: dict) -> dict:
+        """ Adds the baseline's timing to result and judges it, if the baseline has one. """
+        result["ok"] = True
+        before = self.baseline.get(self.key(result), {}).get("seconds")
+        if before is None or "seconds" not in result:
+            return result
+        result["baseline_seconds"] = before
+        result["ratio"] = result["seconds"] / before if before > 0 else float("inf")
+        result["regression"] = result["ratio"] > 1 + self.tolerance
+        result["ok"] = not result["regression"]
+        return result
+
+    def run(self, results) -> dict:
+        """ Runs the benchmarks by consuming results, an iterable of their results. """
+        for result in results:
+            self.json_data["benchmarks"].append(self.compare(result))
+        self.json_data["regressions"] = sum(1 for result in self.json_data["benchmarks"] if not result["ok"])
+        json.dump(self.json_data, self.stream, indent=4)
+        self.stream.write('\n')
+        return self.json_data
@@ -0,0 +1,259 @@
+""" Timings of every data structure over several input sizes and distributions.
+
+    Each Benchmark times one operation on inputs of a given size drawn from one
+    of DISTRIBUTIONS. The suite is run by json_benchmark_runner.JSONBenchmarkRunner,
+    usually through ``python run_tests.py --bench``.
+"""
+from __future__ import annotations
+import random
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from beehive import Beehive, BeehiveSelector
+from balancing import make_ordering
+from bst import BinarySearchTree
+from heap import MaxHeap
+from pairing_heap import PairingMaxHeap
+from ratio import Percentiles
+from threedeebeetree import ThreeDeeBeeTree
+
+SIZES = (10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6)
+DISTRIBUTIONS = ('random', 'sorted', 'clustered')
+CLUSTERS = 10
+SPREAD = 10 ** 6
+# Sorted keys make a BinarySearchTree a path, so filling one with n of them takes
+# about n^2 / 2 steps: 25s at this many, and about 40 minutes a run at 10^5.
+SORTED_TREE_LIMIT = 10 ** 4
+# Stack for the thread running benchmarks that recurse down such a path.
+DEEP_STACK_BYTES = 512 * 1024 * 1024
+
+
+def make_keys(distribution: str, n: int, rng: random.Random) -> list[int]:
+    """
+        n distinct integer keys in the order they are to be inserted: shuffled,
+        increasing, or shuffled but packed into a few narrow bands.
+    """
+    if distribution == 'clustered':
+        starts = rng.sample(range(0, 100 * SPREAD, 10 * SPREAD), CLUSTERS)
+        width = -(-n // CLUSTERS)
+        keys = [start + i for start in starts for i in rng.sample(range(2 * width), width)][:n]
+    else:
+        keys = rng.sample(range(100 * SPREAD), n)
+    if distribution == 'sorted':
+        keys.sort()
+    else:
+        rng.shuffle(keys)
+    return keys
+
+
+def make_points(distribution: str, n: int, rng: random.Random) -> list[tuple[int, int, int]]:
+    """ n distinct points, ordered or grouped as make_keys orders its keys. """
+    points = set()
+    centres = [tuple(rng.randrange(SPREAD) for _ in range(3)) for _ in range(CLUSTERS)]
+    while len(points) < n:
+        if distribution == 'clustered':
+            centre = rng.choice(centres)
+            points.add(tuple(int(rng.gauss(centre[axis], SPREAD / 100)) for axis in range(3)))
+        else:
+            points.add(tuple(rng.randrange(SPREAD) for _ in range(3)))
+    points = list(points)
+    if distribution == 'sorted':
+        points.sort()
+    else:
+        rng.shuffle(points)
+    return points
+
+
+def filled_tree(keys: list[int]) -> BinarySearchTree:
+    tree = BinarySearchTree()
+    for key in keys:
+        tree[key] = key
+    return tree
+
+
+def filled_heap(keys: list[int]) -> MaxHeap:
+    heap = MaxHeap(len(keys))
+    for key in keys:
+        heap.add(key)
+    return heap
+
+
+def filled_pairing_heap(keys: list[int]) -> PairingMaxHeap:
+    heap = PairingMaxHeap()
+    for key in keys:
+        heap.add(key)
+    return heap
+
+
+def filled_percentiles(keys: list[int]) -> Percentiles:
+    percentiles = Percentiles()
+    for key in keys:
+        percentiles.add_point(key)
+    return percentiles
+
+
+def beehives(distribution: str, n: int, rng: random.Random) -> list[Beehive]:
+    return [Beehive(*point, capacity=rng.randint(1, 50), nutrient_factor=rng.randint(1, 10),
+                    volume=rng.randint(0, 500))
+            for point in make_points(distribution, n, rng)]
+
+
+def loaded_selector(hives: list[Beehive]) -> BeehiveSelector:
+    selector = BeehiveSelector(len(hives))
+    selector.set_all_beehives(hives)
+    return selector
+
+
+def harvest_n_times(selector: BeehiveSelector) -> None:
+    for _ in range(selector.max_beehives):
+        selector.harvest_best_beehive()
+
+
+def too_slow(distribution: str, n: int) -> str | None:
+    """ Skips filling a BinarySearchTree with more sorted keys than SORTED_TREE_LIMIT. """
+    if distribution == 'sorted' and n > SORTED_TREE_LIMIT:
+        return 'a BinarySearchTree of {0} sorted keys takes about {0}^2 / 2 steps to fill'.format(n)
+    return None
+
+
+def on_deep_stack(func: Callable[[], Any], depth: int) -> Any:
+    """
+        Returns func(), called in a thread whose stack and recursion limit leave
+        room for depth more nested calls than usual.
+    """
+    outcome = []
+
+    def target():
+        try:
+            outcome.append((True, func()))
+        except BaseException as error:
+            outcome.append((False, error))
+
+    old_stack, old_limit = threading.stack_size(DEEP_STACK_BYTES), sys.getrecursionlimit()
+    sys.setrecursionlimit(old_limit + depth)
+    try:
+        thread = threading.Thread(target=target)
+        thread.start()
+        thread.join()
+    finally:
+        threading.stack_size(old_stack)
+        sys.setrecursionlimit(old_limit)
+    succeeded, value = outcome[0]
+    if not succeeded:
+        raise value
+    return value
+
+
+@dataclass
+class Benchmark:
+    """
+        Times run(prepared) where prepared = setup(keys or points), setup being untimed.
+        Every run makes operations(n) calls to the operation being measured.
+        Recursive benchmarks may recurse once per input, so they run on_deep_stack.
+    """
+
+    name: str
+    make_input: Callable[[str, int, random.Random], Any]
+    setup: Callable[[Any], Any]
+    run: Callable[[Any], Any]
+    operations: Callable[[int], int] = lambda n: n
+    skip: Callable[[str, int], str | None] = lambda distribution, n: None
+    recursive: bool = False
+
+    def measure(self, distribution: str, n: int, repeat: int, seed: int) -> dict:
+        """ Returns this benchmark's result: the best of repeat timings on fresh inputs. """
+        result = {'name': self.name, 'distribution': distribution, 'size': n}
+        reason = self.skip(distribution, n)
+        if reason is not None:
+            result['skipped'] = reason
+            return result
+        if self.recursive:
+            # Twice the depth, for subclasses that wrap each recursive call as
+            # instrumentation does.
+            best = on_deep_stack(lambda: self.best_time(distribution, n, repeat, seed), 2 * n)
+        else:
+            best = self.best_time(distribution, n, repeat, seed)
+        result['seconds'] = best
+        result['operations'] = self.operations(n)
+        result['seconds_per_operation'] = best / result['operations']
+        return result
+
+    def best_time(self, distribution: str, n: int, repeat: int, seed: int) -> float:
+        best = float('inf')
+        for attempt in range(repeat):
+            prepared = self.setup(self.make_input(distribution, n, random.Random(seed + attempt)))
+            start = time.perf_counter()
+            self.run(prepared)
+            best = min(best, time.perf_counter() - start)
+        return best
+
+
+def delete_all(prepared: tuple[BinarySearchTree, list[int]]) -> None:
+    tree, keys = prepared
+    for key in keys:
+        del tree[key]
+
+
+def tree_and_shuffled_keys(keys: list[int]) -> tuple[BinarySearchTree, list[int]]:
+    return filled_tree(keys), random.Random(len(keys)).sample(keys, len(keys))
+
+
+def every_kth_smallest(tree: BinarySearchTree) -> None:
+    for k in range(1, len(tree) + 1):
+        tree.kth_smallest(k, tree.root)
+
+
+def empty_heap(heap: MaxHeap | PairingMaxHeap) -> None:
+    while len(heap) > 0:
+        heap.get_max()
+
+
+def ratio_queries(percentiles: Percentiles) -> None:
+    """ 55 queries, each returning between 10% and all of the points. """
+    for x in range(0, 100, 10):
+        for y in range(0, 100 - x, 10):
+            percentiles.ratio(x, y)
+
+
+def tree_and_points(points: list[tuple[int, int, int]]) -> tuple[ThreeDeeBeeTree, list]:
+    return ThreeDeeBeeTree.from_points(points), points
+
+
+def look_up_all(prepared: tuple[ThreeDeeBeeTree, list]) -> None:
+    tree, points = prepared
+    for point in points:
+        tree[point]
+
+
+def as_is(value):
+    return value
+
+
+BENCHMARKS = [
+    Benchmark('bst.insert', make_keys, as_is, filled_tree, skip=too_slow, recursive=True),
+    Benchmark('bst.delete', make_keys, tree_and_shuffled_keys, delete_all, skip=too_slow, recursive=True),
+    Benchmark('bst.kth_smallest', make_keys, filled_tree, every_kth_smallest, skip=too_slow, recursive=True),
+    Benchmark('heap.add', make_keys, as_is, filled_heap),
+    Benchmark('heap.get_max', make_keys, filled_heap, empty_heap),
+    Benchmark('pairing_heap.add', make_keys, as_is, filled_pairing_heap),
+    Benchmark('pairing_heap.get_max', make_keys, filled_pairing_heap, empty_heap),
+    Benchmark('percentiles.ratio', make_keys, filled_percentiles, ratio_queries,
+              operations=lambda n: 55, skip=too_slow, recursive=True),
+    Benchmark('balancing.make_ordering', make_points, as_is, make_ordering),
+    Benchmark('threedeebeetree.from_points', make_points, as_is, ThreeDeeBeeTree.from_points),
+    Benchmark('threedeebeetree.lookup', make_points, tree_and_points, look_up_all),
+    Benchmark('beehive.harvest', beehives, loaded_selector, harvest_n_times),
+]
+
+
+def run_suite(sizes=SIZES, distributions=DISTRIBUTIONS, prefix: str = '', repeat: int = 3, seed: int = 1234):
+    """ Yields the result of every benchmark whose name starts with prefix, for every size and distribution. """
+    for benchmark in BENCHMARKS:
+        if not benchmark.name.startswith(prefix):
+            continue
+        for n in sizes:
+            for distribution in distributions:
+                yield benchmark.measure(distribution, n, repeat, seed)
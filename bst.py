@@ -93,8 +93,10 @@ class BinarySearchTree(Generic[K, I]):
             self.length += 1
         elif key < current.key:
             current.left = self.insert_aux(current.left, key, item)
+            current.subtree_size += 1
         elif key > current.key:
             current.right = self.insert_aux(current.right, key, item)
+            current.subtree_size += 1
         else:  # key == current.key
             raise ValueError('Inserting duplicate item')
         return current
@@ -131,6 +133,8 @@ class BinarySearchTree(Generic[K, I]):
             current.item = succ.item
             current.right = self.delete_aux(current.right, succ.key)
 
+        # Only reached once a node below current has been removed.
+        current.subtree_size -= 1
         return current
 
     def get_successor(self, current: TreeNode) -> TreeNode:
@@ -138,14 +142,21 @@ class BinarySearchTree(Generic[K, I]):
             Get successor of the current node.
             It should be a child node having the smallest key among all the
             larger keys.
+            Returns None if current has no right subtree.
+            :complexity: O(D) where D is the depth of the right subtree
         """
-        raise NotImplementedError()
+        if current.right is None:
+            return None
+        return self.get_minimal(current.right)
 
     def get_minimal(self, current: TreeNode) -> TreeNode:
         """
             Get a node having the smallest key in the current sub-tree.
+            :complexity: O(D) where D is the depth of the sub-tree
         """
-        raise NotImplementedError()
+        while current.left is not None:
+            current = current.left
+        return current
 
     def is_leaf(self, current: TreeNode) -> bool:
         """ Simple check whether or not the node is a leaf. """
@@ -175,5 +186,16 @@ class BinarySearchTree(Generic[K, I]):
     def kth_smallest(self, k: int, current: TreeNode) -> TreeNode:
         """
         Finds the kth smallest value by key in the subtree rooted at current.
-        """
-        raise NotImplementedError()
+        k counts from 1, and each node's subtree_size tells which side it is on.
+        :complexity: O(D) where D is the depth of the subtree
+        """
+        while current is not None:
+            left_size = 0 if current.left is None else current.left.subtree_size
+            if k <= left_size:
+                current = current.left
+            elif k == left_size + 1:
+                return current
+            else:
+                k -= left_size + 1
+                current = current.right
+        raise IndexError('k is out of range')
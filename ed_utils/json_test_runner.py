@@ -21,12 +21,21 @@ DECORATOR_CLASSES = [
 class JSONTestResult(result.TestResult):
     """A test result class that can print formatted text results to a stream.
 
-    Used by JSONTestRunner.
+    Used by JSONTestRunner. If counters is given, it is called before and
+    after each test for a dict of operation counts, and what changed is added
+    to the test's result.
     """
-    def __init__(self, stream, descriptions, verbosity, results):
+    def __init__(self, stream, descriptions, verbosity, results, counters=None):
         super(JSONTestResult, self).__init__(stream, descriptions, verbosity)
         self.descriptions = descriptions
         self.results = results
+        self.counters = counters
+        self.counts_before = None
+
+    def startTest(self, test):
+        super(JSONTestResult, self).startTest(test)
+        if self.counters is not None:
+            self.counts_before = self.counters()
 
     def getDescription(self, test):
         doc_first_line = test.shortDescription()
@@ -55,6 +64,12 @@ class JSONTestResult(result.TestResult):
             method = getattr(test, test._testMethodName)
             val = getattr(method, dec.get_attr_name(), None)
             dec.change_result(val, result, output, err)
+        if self.counts_before is not None:
+            counts = self.counters()
+            result["counters"] = {
+                name: count - self.counts_before.get(name, 0)
+                for name, count in counts.items() if count != self.counts_before.get(name, 0)
+            }
         return result
 
     def processResult(self, test, err=None):
@@ -83,10 +98,11 @@ class JSONTestRunner(object):
 
     def __init__(self, stream=sys.stdout, descriptions=True, verbosity=1,
                  failfast=False, buffer=True,
-                 stdout_visibility=None):
+                 stdout_visibility=None, counters=None):
         """
         Set buffer to True to include test output in JSON
         """
+        self.counters = counters
         self.stream = stream
         self.descriptions = descriptions
         self.verbosity = verbosity
@@ -100,7 +116,7 @@ class JSONTestRunner(object):
 
     def _makeResult(self):
         return self.resultclass(self.stream, self.descriptions, self.verbosity,
-                                self.json_data["testcases"])
+                                self.json_data["testcases"], self.counters)
 
     def run(self, test):
         "Run the given test case or test suite."
@@ -0,0 +1,134 @@
+"""Running tests in parallel worker processes"""
+from __future__ import print_function
+
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import time
+import unittest
+from multiprocessing.connection import wait
+
+import ed_utils.timeout as timeout_module
+from ed_utils.json_test_runner import JSONTestResult
+
+
+def run_in_worker(test_id, connection, counters):
+    """Worker process body: runs one test and sends back its JSON results."""
+    if hasattr(os, "setpgid"):
+        # Leads a process group of its own, so any processes the test starts
+        # can be killed along with it.
+        os.setpgid(0, 0)
+    timeout_module.RUN_IN_THREAD = False
+    results = []
+    result = JSONTestResult(None, True, 1, results, counters)
+    result.buffer = True
+    try:
+        unittest.defaultTestLoader.loadTestsFromName(test_id)(result)
+    finally:
+        connection.send(results)
+        connection.close()
+
+
+def iter_tests(suite):
+    """Yields every test case in a (nested) test suite, in order."""
+    for test in suite:
+        if isinstance(test, unittest.TestSuite):
+            yield from iter_tests(test)
+        else:
+            yield test
+
+
+class ParallelJSONTestRunner(object):
+    """A test runner that runs every test in its own worker process, at most
+    jobs at a time, and writes the results in JSONTestRunner's JSON form.
+
+    A test running longer than its @timeout allows is stopped by terminating
+    its worker, so it burns no CPU once it has timed out.
+    """
+    # Seconds allowed to tests without a @timeout.
+    default_timeout = 60
+    # Extra seconds a worker gets to start up and set the test up.
+    grace = 1
+
+    def __init__(self, stream=sys.stdout, jobs=None, counters=None):
+        self.stream = stream
+        self.counters = counters
+        self.jobs = jobs or multiprocessing.cpu_count()
+        self.json_data = {
+            "testcases": [],
+        }
+        # Forking reuses the test modules already imported here.
+        methods = multiprocessing.get_all_start_methods()
+        self.context = multiprocessing.get_context("fork" if "fork" in methods else None)
+
+    def time_limit(self, test):
+        method = getattr(test, test._testMethodName)
+        return getattr(method, "__timeout__", self.default_timeout)
+
+    def kill(self, process):
+        """Stops a worker and every process it started."""
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except (AttributeError, ProcessLookupError, PermissionError):
+            process.kill()
+        process.join()
+
+    def failed(self, test, err):
+        """The JSON result of a test that never reported back, failing with err."""
+        results = []
+        result = JSONTestResult(None, True, 1, results)
+        result.processResult(test, (type(err), err, None))
+        return results
+
+    def run(self, test):
+        "Run the given test case or test suite."
+        tests = list(iter_tests(test))
+        # Tests standing in for modules that failed to import cannot be loaded
+        # by name in a worker; they only raise that error, so run them here.
+        local = [t for t in tests if type(t).__module__ == "unittest.loader"]
+        results = {}
+        for t in local:
+            results[id(t)] = []
+            t(JSONTestResult(None, True, 1, results[id(t)]))
+
+        waiting = [t for t in tests if id(t) not in results]
+        waiting.reverse()
+        running = {}  # connection -> (test, process, deadline)
+        while waiting or running:
+            while waiting and len(running) < self.jobs:
+                t = waiting.pop()
+                receiver, sender = self.context.Pipe(duplex=False)
+                process = self.context.Process(target=run_in_worker, args=(t.id(), sender, self.counters))
+                process.start()
+                sender.close()
+                running[receiver] = (t, process, time.monotonic() + self.time_limit(t) + self.grace)
+
+            next_deadline = min(deadline for _, _, deadline in running.values())
+            for connection in wait(list(running), timeout=max(0, next_deadline - time.monotonic())):
+                t, process, _ = running.pop(connection)
+                try:
+                    results[id(t)] = connection.recv()
+                except EOFError:
+                    process.join()
+                    results[id(t)] = self.failed(
+                        t, RuntimeError("Worker exited with code {}".format(process.exitcode)))
+                connection.close()
+                process.join()
+
+            now = time.monotonic()
+            for connection, (t, process, deadline) in list(running.items()):
+                if deadline <= now:
+                    self.kill(process)
+                    connection.close()
+                    del running[connection]
+                    results[id(t)] = self.failed(
+                        t, TimeoutError("Timed out after {} seconds".format(self.time_limit(t))))
+
+        for t in tests:
+            self.json_data["testcases"].extend(results[id(t)])
+        if self.stream is not None:
+            json.dump(self.json_data, self.stream, indent=4)
+            self.stream.write('\n')
+        return self.json_data
@@ -2,6 +2,10 @@ from functools import wraps
 from threading import Thread
 from queue import Queue
 
+# Cleared by ed_utils.parallel_test_runner in its worker processes, which it
+# terminates itself once a test runs over, so tests there run on the main thread.
+RUN_IN_THREAD = True
+
 def do_stuff(q1, a, k, method):
     try:
         q1.put(method(*a, **k))
@@ -12,6 +16,8 @@ def timeout(sec=3):
     def timeout_dec(func):
         @wraps(func)
         def test(*args, **kwargs):
+            if not RUN_IN_THREAD:
+                return func(*args, **kwargs)
             q = Queue()
             p = Thread(target=do_stuff, args=[q, args, kwargs, func], kwargs={}, daemon=True)
             p.start()
@@ -25,5 +31,6 @@ def timeout(sec=3):
                 if isinstance(x, Exception):
                     raise x
                 return x
+        test.__timeout__ = sec
         return test
     return timeout_dec
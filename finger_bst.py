@@ -0,0 +1,72 @@
+""" Binary Search Tree with finger search.
+    Lookups start from the node last looked up rather than from the root,
+    which is cheaper when consecutive lookups ask for nearby keys.
+"""
+
+from __future__ import annotations
+
+__docformat__ = 'reStructuredText'
+
+from typing import TypeVar
+from bst import BinarySearchTree
+from node import TreeNode
+
+K = TypeVar('K')
+I = TypeVar('I')
+
+
+class FingerBinarySearchTree(BinarySearchTree[K, I]):
+    """
+        BinarySearchTree remembering the path to the node last looked up, the
+        finger. Each node on it is kept with the exclusive bounds (None when
+        unbounded) that every key in its subtree lies between.
+
+        A lookup climbs the finger to the lowest node whose bounds admit the key,
+        the lowest common ancestor of the finger and the key, and descends from
+        there. Two keys d apart in rank meet, in a random tree, O(log d) levels
+        above either, so that is roughly what the climb and descent cost.
+    """
+
+    def __init__(self) -> None:
+        """
+            Initialises an empty Binary Search Tree
+            :complexity: O(1)
+        """
+        super().__init__()
+        self.finger = []  # (node, lower bound, upper bound) from the root down
+
+    def get_tree_node_by_key(self, key: K) -> TreeNode:
+        """
+            Finds the node holding key starting from the finger, then moves the
+            finger to the last node reached.
+            :complexity: O(U + D) where U is the number of levels climbed and D
+            the number descended
+        """
+        finger = self.finger
+        while len(finger) > 0:
+            _, lower, upper = finger[-1]
+            if (lower is None or lower < key) and (upper is None or key < upper):
+                break
+            finger.pop()
+        if len(finger) == 0:
+            if self.root is None:
+                raise KeyError('Key not found: {0}'.format(key))
+            finger.append((self.root, None, None))
+
+        current, lower, upper = finger[-1]
+        while key != current.key:
+            if key < current.key:
+                current, upper = current.left, current.key
+            else:
+                current, lower = current.right, current.key
+            if current is None:
+                raise KeyError('Key not found: {0}'.format(key))
+            finger.append((current, lower, upper))
+        return current
+
+    def __delitem__(self, key: K) -> None:
+        """
+            Deletes key, dropping the finger since deletion may move keys between nodes.
+        """
+        self.finger = []
+        super().__delitem__(key)
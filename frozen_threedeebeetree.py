@@ -0,0 +1,108 @@
+""" Read-only, array-backed snapshot of a ThreeDeeBeeTree for batch lookups. """
+from __future__ import annotations
+from typing import Generic
+import numpy as np
+from threedeebeetree import ThreeDeeBeeTree, I, OCTANTS
+
+
+class FrozenThreeDeeBeeTree(Generic[I]):
+    """
+        Nodes are numbered breadth-first from the root (node 0). Row i of keys,
+        children, subtree_sizes, items and live describes node i; an empty
+        octant is -1. Dead nodes are kept, as in the tree, to route lookups.
+
+        Lookups use copies of these laid out for them: key_columns holds the
+        keys one axis per array, and child_table holds children flattened, so
+        that the child of node i in octant o is child_table[i * 8 + o]. Both
+        have an extra sentinel node past the last, standing in for every empty
+        octant, whose children are all itself.
+    """
+
+    def __init__(self, tree: ThreeDeeBeeTree[I]) -> None:
+        """
+            Flattens tree into contiguous arrays.
+            :complexity: O(N) where N is the number of nodes in tree
+        """
+        nodes = [] if tree.root is None else [tree.root]
+        keys, children, sizes, items, live = [], [], [], [], []
+        # Node i is the first of its level once i reaches next_level.
+        self.depth, next_level = 0, 0
+        i = 0
+        while i < len(nodes):
+            if i == next_level:
+                self.depth, next_level = self.depth + 1, len(nodes)
+            node = nodes[i]
+            keys.append(node.key)
+            sizes.append(node.subtree_size)
+            items.append(node.item)
+            live.append(node.live)
+            row = [-1] * OCTANTS
+            for octant, child in enumerate(node.children):
+                if child is not None:
+                    row[octant] = len(nodes)
+                    nodes.append(child)
+            children.append(row)
+            i += 1
+
+        self.keys = np.array(keys, dtype=np.int64).reshape(-1, 3)
+        self.children = np.array(children, dtype=np.int64).reshape(-1, OCTANTS)
+        self.subtree_sizes = np.array(sizes, dtype=np.int64)
+        # An object array, so get_many can gather items without a Python loop.
+        self.items = np.fromiter(items, dtype=object, count=len(items))
+        # With a False past the last node, so live[-1] holds for a failed lookup.
+        self.live = np.array(live + [False], dtype=bool)
+        self.length = tree.length
+
+        sentinel = len(items)
+        self.key_columns = tuple(np.append(self.keys[:, axis], 0) for axis in range(3))
+        self.child_table = np.append(np.where(self.children < 0, sentinel, self.children),
+                                     np.full(OCTANTS, sentinel)).astype(np.intp)
+
+    def __len__(self) -> int:
+        return self.length
+
+    def locate(self, points) -> np.ndarray:
+        """
+            Returns the node index holding each of the (m, 3) points, or -1 where
+            a point is absent. Every query moves down one level per step, so the
+            loop runs once per level rather than once per point.
+            Queries are never picked out of the batch: one that runs out of tree
+            stays at the sentinel, and one that has found its key carries on
+            below it without matching again, since keys are distinct.
+            :complexity: O(m * D) array work in D Python-level steps, where D is
+            the depth of the tree
+        """
+        points = np.asarray(points, dtype=np.int64).reshape(-1, 3)
+        sentinel = len(self.items)
+        found = np.full(len(points), -1, dtype=np.intp)
+        current = np.zeros(len(points), dtype=np.intp)
+        query_x, query_y, query_z = (np.ascontiguousarray(points[:, axis]) for axis in range(3))
+        key_x, key_y, key_z = self.key_columns
+        for _ in range(self.depth):
+            x, y, z = key_x[current], key_y[current], key_z[current]
+            octant = (query_x >= x).view(np.uint8) << 2
+            octant |= (query_y >= y).view(np.uint8) << 1
+            octant |= (query_z >= z).view(np.uint8)
+            hit = query_x == x
+            hit &= query_y == y
+            hit &= query_z == z
+            hit &= current != sentinel
+            np.copyto(found, current, where=hit)
+            current *= OCTANTS
+            current += octant
+            current = self.child_table[current]
+        found[~self.live[found]] = -1
+        return found
+
+    def contains_many(self, points) -> np.ndarray:
+        """ Returns a boolean array telling which of the (m, 3) points are in the tree. """
+        return self.locate(points) >= 0
+
+    def get_many(self, points) -> list[I]:
+        """ Returns the items stored under each of the (m, 3) points, in order. """
+        points = np.asarray(points, dtype=np.int64).reshape(-1, 3)
+        indices = self.locate(points)
+        missing = np.flatnonzero(indices < 0)
+        if missing.size > 0:
+            raise KeyError('Key not found: {0}'.format(tuple(points[missing[0]].tolist())))
+        return self.items[indices].tolist()
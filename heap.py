@@ -42,6 +42,39 @@ class MaxHeap(Generic[T]):
         self.the_array[self.length] = element
         self.rise(self.length)
 
+    def heapify(self, elements: list[T]) -> None:
+        """
+        Adds every element, then restores heap order bottom-up.
+        :complexity: O(N + M) where N is the heap's length and M is len(elements)
+        """
+        if self.length + len(elements) + 1 > len(self.the_array):
+            raise IndexError
+
+        for element in elements:
+            self.length += 1
+            self.the_array[self.length] = element
+        for k in range(self.length // 2, 0, -1):
+            self.sink(k)
+
+    def entries(self) -> list[T]:
+        """
+        Returns the elements in the heap's array order, as restore takes them.
+        :complexity: O(N) where N is the heap's length
+        """
+        return self.the_array[1:self.length + 1]
+
+    def restore(self, elements: list[T]) -> None:
+        """
+        Replaces the heap's elements with ones already in heap order, such as
+        those entries returned, without heapifying them again.
+        :complexity: O(M) where M is len(elements)
+        """
+        if len(elements) + 1 > len(self.the_array):
+            raise IndexError
+
+        self.the_array[1:len(elements) + 1] = elements
+        self.length = len(elements)
+
     def largest_child(self, k: int) -> int:
         """
         Returns the index of k's child with greatest value.
@@ -70,6 +103,13 @@ class MaxHeap(Generic[T]):
 
         self.the_array[k] = item
         
+    def peek_max(self) -> T:
+        """ Return (without removing) the maximum element from the heap. """
+        if self.length == 0:
+            raise IndexError
+
+        return self.the_array[1]
+
     def get_max(self) -> T:
         """ Remove (and return) the maximum element from the heap. """
         if self.length == 0:
@@ -0,0 +1,217 @@
+""" Opt-in operation counters for BinarySearchTree, MaxHeap, ThreeDeeBeeTree and Percentiles.
+
+    Each structure has an instrumented subclass counting its work in COUNTS.
+    enable() swaps the subclasses in for the originals wherever a module holds
+    them by name, so structures made from then on are counted; disable() swaps
+    the originals back. While disabled the originals run untouched, at no cost.
+
+    Subclasses of the originals defined elsewhere, such as FingerBinarySearchTree
+    or beehive.HiveTree, are swapped too, for a class deriving from both the
+    subclass and the original's instrumented subclass. Methods such a subclass
+    overrides are only counted where they call back into the methods counted
+    here; FingerBinarySearchTree's lookups, which walk from the finger on their
+    own, are not.
+
+    Counters:
+        bst.visits, bst.comparisons       nodes reached and key comparisons made
+        heap.rises, heap.sinks            calls to MaxHeap.rise and MaxHeap.sink
+        heap.sink_steps                   levels a sinking element looked down
+        threedeebeetree.visits            nodes reached while searching for keys
+        threedeebeetree.rebuilds          subtrees rebuilt to restore balance...
+        threedeebeetree.rebuilt_nodes     ...and the nodes they held
+        percentiles.ratios                calls to Percentiles.ratio...
+        percentiles.points                ...and the points they returned
+"""
+from __future__ import annotations
+import sys
+from collections import Counter
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+from bst import BinarySearchTree
+from heap import MaxHeap
+from node import TreeNode
+from ratio import Percentiles
+from threedeebeetree import BeeNode, Point, ThreeDeeBeeTree
+
+COUNTS = Counter()
+
+
+class InstrumentedBinarySearchTree(BinarySearchTree):
+
+    def get_tree_node_by_key_aux(self, current: TreeNode, key) -> TreeNode:
+        if current is not None:
+            COUNTS['bst.visits'] += 1
+            COUNTS['bst.comparisons'] += 1 if key == current.key else 2
+        return super().get_tree_node_by_key_aux(current, key)
+
+    def insert_aux(self, current: TreeNode, key, item) -> TreeNode:
+        if current is not None:
+            COUNTS['bst.visits'] += 1
+            COUNTS['bst.comparisons'] += 1 if key < current.key else 2
+        return super().insert_aux(current, key, item)
+
+    def delete_aux(self, current: TreeNode, key) -> TreeNode:
+        if current is not None:
+            COUNTS['bst.visits'] += 1
+            COUNTS['bst.comparisons'] += 1 if key < current.key else 2
+        return super().delete_aux(current, key)
+
+    # These two walk straight down from current to the node they return, so
+    # they are counted by the length of that path once the real method is done.
+
+    def get_minimal(self, current: TreeNode) -> TreeNode:
+        found = super().get_minimal(current)
+        COUNTS['bst.visits'] += path_length(current, found)
+        return found
+
+    def kth_smallest(self, k: int, current: TreeNode) -> TreeNode:
+        found = super().kth_smallest(k, current)
+        COUNTS['bst.visits'] += path_length(current, found)
+        return found
+
+
+def path_length(current: TreeNode, target: TreeNode) -> int:
+    """ The number of nodes from current down to target, both included, which lies below it. """
+    length = 1
+    while current is not target:
+        current = current.left if target.key < current.key else current.right
+        length += 1
+    return length
+
+
+class InstrumentedMaxHeap(MaxHeap):
+
+    def rise(self, k: int) -> None:
+        COUNTS['heap.rises'] += 1
+        super().rise(k)
+
+    def sink(self, k: int) -> None:
+        COUNTS['heap.sinks'] += 1
+        super().sink(k)
+
+    def largest_child(self, k: int) -> int:
+        COUNTS['heap.sink_steps'] += 1
+        return super().largest_child(k)
+
+
+class InstrumentedThreeDeeBeeTree(ThreeDeeBeeTree):
+
+    def get_tree_node_by_key(self, key: Point) -> BeeNode:
+        path = self.search_path(key)
+        if len(path) > 0 and path[-1].key == key and path[-1].live:
+            return path[-1]
+        raise KeyError('Key not found: {0}'.format(key))
+
+    def search_path(self, key: Point) -> list[BeeNode]:
+        path = super().search_path(key)
+        COUNTS['threedeebeetree.visits'] += len(path)
+        return path
+
+    def rebuild_first_unbalanced(self, path: list[BeeNode], key: Point, deepest_first: bool = False,
+                                 unbalanced: Callable[[BeeNode], bool] | None = None) -> BeeNode | None:
+        # Bulk builds and clearing out dead nodes restore no balance, so only
+        # rebuilds of unbalanced subtrees are counted.
+        rebuilt = super().rebuild_first_unbalanced(path, key, deepest_first, unbalanced)
+        if rebuilt is not None:
+            COUNTS['threedeebeetree.rebuilds'] += 1
+            COUNTS['threedeebeetree.rebuilt_nodes'] += rebuilt.subtree_size
+        return rebuilt
+
+
+class InstrumentedPercentiles(Percentiles):
+
+    def ratio(self, x, y):
+        points = super().ratio(x, y)
+        COUNTS['percentiles.ratios'] += 1
+        COUNTS['percentiles.points'] += len(points)
+        return points
+
+
+INSTRUMENTED = {
+    BinarySearchTree: InstrumentedBinarySearchTree,
+    MaxHeap: InstrumentedMaxHeap,
+    ThreeDeeBeeTree: InstrumentedThreeDeeBeeTree,
+    Percentiles: InstrumentedPercentiles,
+}
+# Instrumented stand-ins made for subclasses of the originals, by subclass.
+derived = {}
+# (module, name, original) of every reference enable() has swapped.
+swapped = []
+
+
+def stand_ins() -> dict[type, type]:
+    """
+        Maps every original, and every subclass of one defined so far, to the
+        class enable() puts in its place, making any missing stand-ins.
+    """
+    mapping = dict(INSTRUMENTED)
+    for original, instrumented in INSTRUMENTED.items():
+        stack = original.__subclasses__()
+        while stack:
+            cls = stack.pop()
+            if cls in INSTRUMENTED.values() or cls in derived.values() or cls in mapping:
+                continue
+            if cls not in derived:
+                derived[cls] = type('Instrumented' + cls.__name__, (cls, instrumented), {'__module__': __name__})
+            mapping[cls] = derived[cls]
+            stack.extend(cls.__subclasses__())
+    return mapping
+
+
+def enabled() -> bool:
+    return len(swapped) > 0
+
+
+def enable() -> None:
+    """
+        Swaps the instrumented subclasses in for every module-level reference to
+        the originals, or to their subclasses, in the modules loaded so far.
+        Does nothing if already enabled.
+        :complexity: O(M) where M is the number of names in every loaded module
+    """
+    if enabled():
+        return
+    mapping = stand_ins()
+    for module in list(sys.modules.values()):
+        if module is None or module.__name__ == __name__:
+            continue
+        for name, value in list(vars(module).items()):
+            if isinstance(value, type) and value in mapping:
+                swapped.append((module, name, value))
+                setattr(module, name, mapping[value])
+
+
+def disable() -> None:
+    """ Puts back every original enable() swapped out. Counters are kept. """
+    while swapped:
+        module, name, original = swapped.pop()
+        setattr(module, name, original)
+
+
+def stats() -> dict[str, int]:
+    """ A snapshot of every counter so far. """
+    return dict(COUNTS)
+
+
+def reset() -> None:
+    COUNTS.clear()
+
+
+@contextmanager
+def counting() -> Iterator[Counter]:
+    """
+        Counts the work done inside a with block, enabling instrumentation for
+        the block if needed. Yields a Counter which, once the block is over,
+        holds every count made during it.
+    """
+    was_enabled = enabled()
+    enable()
+    before = Counter(COUNTS)
+    block = Counter()
+    try:
+        yield block
+    finally:
+        block.update(COUNTS - before)
+        if not was_enabled:
+            disable()
@@ -0,0 +1,195 @@
+""" Spatial index keeping points sorted by their Morton (Z-order) codes.
+
+    A point's Morton code interleaves the bits of its three coordinates, so
+    points sharing an aligned cube share a code prefix and every such cube is
+    one contiguous run of codes. Exact lookups become binary searches over a
+    sorted list of integers, and box queries become a handful of range scans.
+"""
+from __future__ import annotations
+from bisect import bisect_left, bisect_right
+from typing import Generic, Iterator
+from threedeebeetree import Point, I
+
+BITS = 21  # per axis, so a code fits in 63 bits
+# Coordinates must lie in [-OFFSET, OFFSET) and are shifted onto [0, 2 ** BITS).
+OFFSET = 1 << (BITS - 1)
+
+
+def spread_bits(value: int) -> int:
+    """ Moves bit i of a BITS-bit value to bit 3i. """
+    value &= 0x1fffff
+    value = (value | value << 32) & 0x1f00000000ffff
+    value = (value | value << 16) & 0x1f0000ff0000ff
+    value = (value | value << 8) & 0x100f00f00f00f00f
+    value = (value | value << 4) & 0x10c30c30c30c30c3
+    value = (value | value << 2) & 0x1249249249249249
+    return value
+
+
+def compact_bits(value: int) -> int:
+    """ Inverse of spread_bits: gathers bits 0, 3, 6, ... into a BITS-bit value. """
+    value &= 0x1249249249249249
+    value = (value | value >> 2) & 0x10c30c30c30c30c3
+    value = (value | value >> 4) & 0x100f00f00f00f00f
+    value = (value | value >> 8) & 0x1f0000ff0000ff
+    value = (value | value >> 16) & 0x1f00000000ffff
+    value = (value | value >> 32) & 0x1fffff
+    return value
+
+
+def morton_encode(point: Point) -> int:
+    """
+        Interleaves the (shifted) coordinates, x taking the highest bit of each
+        triple, so the codes of a cube's eight halves ascend in octant order.
+    """
+    for coordinate in point:
+        if not -OFFSET <= coordinate < OFFSET:
+            raise ValueError('Coordinate {0} outside [{1}, {2})'.format(coordinate, -OFFSET, OFFSET))
+    return spread_bits(point[0] + OFFSET) << 2 | spread_bits(point[1] + OFFSET) << 1 | spread_bits(point[2] + OFFSET)
+
+
+def morton_decode(code: int) -> Point:
+    return compact_bits(code >> 2) - OFFSET, compact_bits(code >> 1) - OFFSET, compact_bits(code) - OFFSET
+
+
+class MortonIndex(Generic[I]):
+    """ Point -> item map over parallel lists of sorted Morton codes and their items. """
+
+    # Box queries scan, rather than split, cubes straddling the box that hold
+    # at most SCAN_CODES points, and stop splitting once MAX_STRADDLING_CUBES remain.
+    SCAN_CODES = 16
+    MAX_STRADDLING_CUBES = 256
+
+    def __init__(self) -> None:
+        self.codes = []
+        self.items = []
+
+    @classmethod
+    def from_points(cls, points: list[Point], items: list[I] | None = None) -> MortonIndex[I]:
+        """
+            Builds an index holding items[i] under points[i] (None if items is not given).
+            :complexity: O(N log N) where N is the number of points
+        """
+        if items is None:
+            items = [None] * len(points)
+        elif len(items) != len(points):
+            raise ValueError('Expected one item per point')
+        pairs = sorted(zip(map(morton_encode, points), items), key=lambda pair: pair[0])
+        index = cls()
+        index.codes = [code for code, _ in pairs]
+        index.items = [item for _, item in pairs]
+        for i in range(1, len(index.codes)):
+            if index.codes[i] == index.codes[i - 1]:
+                raise ValueError('Inserting duplicate item')
+        return index
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def is_empty(self) -> bool:
+        return len(self) == 0
+
+    def position(self, key: Point) -> int:
+        """ Returns the index of key's code in self.codes, raising a KeyError if absent. """
+        code = morton_encode(key)
+        i = bisect_left(self.codes, code)
+        if i == len(self.codes) or self.codes[i] != code:
+            raise KeyError('Key not found: {0}'.format(key))
+        return i
+
+    def __contains__(self, key: Point) -> bool:
+        try:
+            self.position(key)
+            return True
+        except KeyError:
+            return False
+
+    def __getitem__(self, key: Point) -> I:
+        """
+            :complexity: O(log N) where N is the number of points
+        """
+        return self.items[self.position(key)]
+
+    def __setitem__(self, key: Point, item: I) -> None:
+        """
+            :complexity: O(N) worst case to shift the lists, though that is a
+            single memory move; O(log N) comparisons
+        """
+        code = morton_encode(key)
+        i = bisect_left(self.codes, code)
+        if i < len(self.codes) and self.codes[i] == code:
+            raise ValueError('Inserting duplicate item')
+        self.codes.insert(i, code)
+        self.items.insert(i, item)
+
+    def __delitem__(self, key: Point) -> None:
+        i = self.position(key)
+        del self.codes[i]
+        del self.items[i]
+
+    def code_ranges(self, lo: Point, hi: Point) -> list[tuple[int, int, bool]]:
+        """
+            Covers the box with corners lo and hi by ascending, disjoint ranges of
+            codes, each given as (first code, last code, whether every code in it
+            lies in the box). Aligned cubes are split level by level, dropping
+            those outside the box or holding no points. Cubes straddling the box's
+            boundary are covered approximately once they hold few points, or once
+            too many of them remain.
+        """
+        lo = [max(coordinate + OFFSET, 0) for coordinate in lo]
+        hi = [min(coordinate + OFFSET, (1 << BITS) - 1) for coordinate in hi]
+        if any(lo[axis] > hi[axis] for axis in range(3)):
+            return []
+        ranges = []
+        straddling = [(0, 0, 0)]  # minimum corners of cubes with side 2 ** level
+        level = BITS
+        while len(straddling) > 0:
+            if level == 0 or len(straddling) * 8 > self.MAX_STRADDLING_CUBES:
+                for corner in straddling:
+                    first = spread_bits(corner[0]) << 2 | spread_bits(corner[1]) << 1 | spread_bits(corner[2])
+                    ranges.append((first, first + (1 << 3 * level) - 1, False))
+                break
+            level -= 1
+            side = 1 << level
+            halves = []
+            for x, y, z in straddling:
+                for octant in range(8):
+                    corner = (x + (octant >> 2) * side, y + (octant >> 1 & 1) * side, z + (octant & 1) * side)
+                    if any(corner[axis] > hi[axis] or corner[axis] + side - 1 < lo[axis] for axis in range(3)):
+                        continue
+                    first = spread_bits(corner[0]) << 2 | spread_bits(corner[1]) << 1 | spread_bits(corner[2])
+                    last = first + (1 << 3 * level) - 1
+                    held = bisect_right(self.codes, last) - bisect_left(self.codes, first)
+                    if held == 0:
+                        continue
+                    if all(lo[axis] <= corner[axis] and corner[axis] + side - 1 <= hi[axis] for axis in range(3)):
+                        ranges.append((first, last, True))
+                    elif held <= self.SCAN_CODES:
+                        ranges.append((first, last, False))
+                    else:
+                        halves.append(corner)
+            straddling = halves
+
+        ranges.sort()
+        merged = []
+        for first, last, exact in ranges:
+            if len(merged) > 0 and merged[-1][1] + 1 == first:
+                merged[-1] = (merged[-1][0], last, merged[-1][2] and exact)
+            else:
+                merged.append((first, last, exact))
+        return merged
+
+    def query_box(self, lo: Point, hi: Point) -> Iterator[tuple[Point, I]]:
+        """
+            Yields every (key, item) pair whose key lies inside the box with
+            corners lo and hi (inclusive on every side), in Morton order.
+            :complexity: O(R log N + K) where R is the number of code ranges
+            covering the box and K the number of codes scanned in them
+        """
+        for first, last, exact in self.code_ranges(lo, hi):
+            i = bisect_left(self.codes, first)
+            while i < len(self.codes) and self.codes[i] <= last:
+                key = morton_decode(self.codes[i])
+                if exact or all(lo[axis] <= key[axis] <= hi[axis] for axis in range(3)):
+                    yield key, self.items[i]
+                i += 1
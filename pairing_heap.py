@@ -0,0 +1,120 @@
+"""Meldable Max Heap implemented as a pairing heap of linked nodes"""
+from __future__ import annotations
+__docformat__ = 'reStructuredText'
+
+from typing import Generic
+from referential_array import T
+
+
+class PairingNode(Generic[T]):
+    """ A heap-ordered node: its children are its first child and that child's siblings. """
+
+    __slots__ = ('element', 'child', 'sibling')
+
+    def __init__(self, element: T) -> None:
+        self.element = element
+        self.child = None
+        self.sibling = None
+
+
+class PairingMaxHeap(Generic[T]):
+    """
+    Max heap with the interface of heap.MaxHeap, minus its fixed capacity,
+    which can also absorb another heap in O(1) with merge.
+    Nodes freed by get_max are kept in a pool, chained through their sibling
+    fields, and reused by later adds.
+    """
+
+    def __init__(self) -> None:
+        self.root = None
+        self.length = 0
+        self.pool = None
+
+    def __len__(self) -> int:
+        return self.length
+
+    def is_empty(self) -> bool:
+        return self.length == 0
+
+    @staticmethod
+    def link(a: PairingNode, b: PairingNode) -> PairingNode:
+        """
+        Makes the root with the smaller element the first child of the other,
+        returning the new root.
+        :complexity: O(1)
+        """
+        if a.element < b.element:
+            a, b = b, a
+        b.sibling = a.child
+        a.child = b
+        return a
+
+    def add(self, element: T) -> None:
+        """
+        :complexity: O(1)
+        """
+        node = self.pool
+        if node is None:
+            node = PairingNode(element)
+        else:
+            self.pool = node.sibling
+            node.element = element
+            node.sibling = None
+        self.root = node if self.root is None else self.link(self.root, node)
+        self.length += 1
+
+    def merge(self, other: PairingMaxHeap[T]) -> None:
+        """
+        Moves every element of other into this heap, leaving other empty.
+        :complexity: O(1)
+        """
+        if other is self:
+            raise ValueError('Cannot merge a heap with itself')
+        if other.root is not None:
+            self.root = other.root if self.root is None else self.link(self.root, other.root)
+            self.length += other.length
+            other.root = None
+            other.length = 0
+
+    def peek_max(self) -> T:
+        """ Return (without removing) the maximum element from the heap. """
+        if self.length == 0:
+            raise IndexError
+
+        return self.root.element
+
+    def get_max(self) -> T:
+        """
+        Remove (and return) the maximum element from the heap.
+        The root's children are linked in pairs from left to right, and the
+        pairs are then linked into one from right to left.
+        :complexity: O(log N) amortised where N is the number of elements
+        """
+        if self.length == 0:
+            raise IndexError
+
+        root = self.root
+        pairs = []
+        current = root.child
+        while current is not None:
+            following = current.sibling
+            if following is None:
+                current.sibling = None
+                pairs.append(current)
+                break
+            after = following.sibling
+            current.sibling = following.sibling = None
+            pairs.append(self.link(current, following))
+            current = after
+        new_root = None
+        while pairs:
+            node = pairs.pop()
+            new_root = node if new_root is None else self.link(node, new_root)
+        self.root = new_root
+        self.length -= 1
+
+        max_elt = root.element
+        root.element = root.child = None
+        root.sibling = self.pool
+        self.pool = root
+        return max_elt
@@ -1,4 +1,5 @@
 from __future__ import annotations
+from dataclasses import dataclass
 from typing import Generic, TypeVar
 from math import ceil
 from bst import BinarySearchTree
@@ -6,19 +7,166 @@ from bst import BinarySearchTree
 T = TypeVar("T")
 I = TypeVar("I")
 
+@dataclass
+class Tracker(Generic[T]):
+    """
+        Handle returned by Percentiles.track. value is the p-th percentile of the
+        points, the one of rank max(1, ceil(p% of N)), or None if there are none.
+    """
+
+    p: float
+    value: T | None = None
+    # Rank of value among the points, counting from 1.
+    rank: int = 0
+
+    def target_rank(self, n: int) -> int:
+        return 0 if n == 0 else max(1, ceil(self.p * n / 100))
+
 class Percentiles(Generic[T]):
+    """
+        Keeps the points in a BinarySearchTree, keyed by the points themselves.
+        Tracked percentiles are moved along with every point added or removed.
+    """
 
     def __init__(self) -> None:
-        raise NotImplementedError()
+        self.tree = BinarySearchTree()
+        self.trackers = []
     
     def add_point(self, item: T):
-        raise NotImplementedError()
+        """
+            :complexity: O((T + 1) * D) where T is the number of trackers and
+            D is the depth of the tree
+        """
+        self.tree[item] = item
+        for tracker in self.trackers:
+            if tracker.value is None or item < tracker.value:
+                tracker.rank += 1
+            if tracker.value is None:
+                tracker.value = item
+            self.settle(tracker)
     
     def remove_point(self, item: T):
-        raise NotImplementedError()
+        """
+            :complexity: O((T + 1) * D) where T is the number of trackers and
+            D is the depth of the tree
+        """
+        del self.tree[item]
+        for tracker in self.trackers:
+            if item == tracker.value:
+                # The next point up takes over the removed one's rank.
+                tracker.value = self.next_point(item)
+                if tracker.value is None:
+                    tracker.value = self.previous_point(item)
+                    tracker.rank -= 1
+            elif item < tracker.value:
+                tracker.rank -= 1
+            self.settle(tracker)
+
+    def track(self, p: float) -> Tracker[T]:
+        """
+            Returns a Tracker whose value is kept at the p-th percentile of the
+            points as they are added and removed. Reading it costs nothing; each
+            update moves it at most one point up or down.
+            :complexity: O(D) where D is the depth of the tree
+        """
+        if not 0 <= p <= 100:
+            raise ValueError('Expected p between 0 and 100')
+        tracker = Tracker(p)
+        tracker.rank = tracker.target_rank(len(self.tree))
+        if tracker.rank > 0:
+            tracker.value = self.tree.kth_smallest(tracker.rank, self.tree.root).key
+        self.trackers.append(tracker)
+        return tracker
+
+    def untrack(self, tracker: Tracker[T]):
+        """ Stops keeping tracker up to date. """
+        self.trackers.remove(tracker)
+
+    def settle(self, tracker: Tracker[T]):
+        """
+            Steps tracker to the neighbouring point until its rank is the one its
+            percentile calls for, which is at most one step after a single update.
+            :complexity: O(D) per step where D is the depth of the tree
+        """
+        target = tracker.target_rank(len(self.tree))
+        if target == 0:
+            tracker.value, tracker.rank = None, 0
+        while tracker.rank < target:
+            tracker.value, tracker.rank = self.next_point(tracker.value), tracker.rank + 1
+        while tracker.rank > target:
+            tracker.value, tracker.rank = self.previous_point(tracker.value), tracker.rank - 1
+
+    def next_point(self, item: T) -> T | None:
+        """
+            Returns the smallest point above item, which need not be a point itself,
+            or None if there is none.
+            :complexity: O(D) where D is the depth of the tree
+        """
+        current, above = self.tree.root, None
+        while current is not None and current.key != item:
+            if item < current.key:
+                above, current = current, current.left
+            else:
+                current = current.right
+        if current is not None and current.right is not None:
+            return self.tree.get_successor(current).key
+        return None if above is None else above.key
+
+    def previous_point(self, item: T) -> T | None:
+        """
+            Returns the largest point below item, which need not be a point itself,
+            or None if there is none.
+            :complexity: O(D) where D is the depth of the tree
+        """
+        current, below = self.tree.root, None
+        while current is not None and current.key != item:
+            if item < current.key:
+                current = current.left
+            else:
+                below, current = current, current.right
+        if current is not None and current.left is not None:
+            current = current.left
+            while current.right is not None:
+                current = current.right
+            return current.key
+        return None if below is None else below.key
 
     def ratio(self, x, y):
-        raise NotImplementedError()
+        """
+            Returns the points left after leaving out the ceil(x% of N) smallest
+            and the ceil(y% of N) largest, in increasing order.
+            :complexity: O(D + O) where D is the depth of the tree and O is the
+            number of points returned
+        """
+        n = len(self.tree)
+        first = ceil(x * n / 100) + 1
+        last = n - ceil(y * n / 100)
+        if first > last:
+            return []
+        low = self.tree.kth_smallest(first, self.tree.root).key
+        high = self.tree.kth_smallest(last, self.tree.root).key
+        return self.points_between(low, high)
+
+    def points_between(self, low: T, high: T) -> list[T]:
+        """
+            Returns the points from low to high inclusive, in increasing order,
+            walking in-order but only into subtrees that can hold such points.
+            :complexity: O(D + O) where D is the depth of the tree and O is the
+            number of points returned
+        """
+        points = []
+        stack = []
+        current = self.tree.root
+        while stack or current is not None:
+            if current is not None:
+                stack.append(current)
+                current = current.left if low < current.key else None
+            else:
+                current = stack.pop()
+                if low <= current.key <= high:
+                    points.append(current.key)
+                current = current.right if current.key < high else None
+        return points
 
 if __name__ == "__main__":
     points = list(range(50))
@@ -1,5 +1,7 @@
 import argparse
+import json
 import re
+import sys
 import unittest
 from io import StringIO
 
@@ -31,7 +33,69 @@ if __name__ == "__main__":
         help="Use if running on Ed.",
         action="store_true",
     )
+    p.add_argument(
+        "-j",
+        "--jobs",
+        help=(
+            "Run the tests in this many worker processes at once. "
+            "A test running over its timeout has its worker terminated."
+        ),
+        type=int,
+        default=None,
+    )
+    p.add_argument(
+        "--count",
+        help="Count each test's operations, adding them to its JSON result (with -e).",
+        action="store_true",
+    )
+    p.add_argument(
+        "--bench",
+        help=(
+            "Time the data structures instead of testing them, printing JSON. "
+            "The task, if given, picks benchmarks by name prefix, e.g. bst."
+        ),
+        action="store_true",
+    )
+    p.add_argument(
+        "--sizes",
+        help="Input sizes to benchmark, between 1000 and 1000000.",
+        type=int,
+        nargs="+",
+        default=[10 ** 3, 10 ** 4],
+    )
+    p.add_argument(
+        "--distributions",
+        help="Input distributions to benchmark.",
+        nargs="+",
+        default=["random", "sorted", "clustered"],
+    )
+    p.add_argument("--repeat", help="Keep the best of this many timings.", type=int, default=3)
+    p.add_argument("--baseline", help="JSON from an earlier --bench run to compare against.")
+    p.add_argument("--save-baseline", help="Also write the results to this file.")
+    p.add_argument(
+        "--tolerance",
+        help="How much slower than the baseline still passes, as a fraction.",
+        type=float,
+        default=0.25,
+    )
     args = p.parse_args()
+    if args.bench and any(not 10 ** 3 <= size <= 10 ** 6 for size in args.sizes):
+        p.error("--sizes must be between 1000 and 1000000")
+
+    if args.bench:
+        from benchmarks.json_benchmark_runner import JSONBenchmarkRunner
+        from benchmarks.suite import run_suite
+
+        baseline = None
+        if args.baseline:
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        runner = JSONBenchmarkRunner(baseline=baseline, tolerance=args.tolerance)
+        results = runner.run(run_suite(args.sizes, args.distributions, args.task, args.repeat))
+        if args.save_baseline:
+            with open(args.save_baseline, "w") as f:
+                json.dump(results, f, indent=4)
+        sys.exit(1 if results["regressions"] > 0 else 0)
 
     suite = unittest.defaultTestLoader.discover('.')
     for s in suite:
@@ -47,9 +111,30 @@ if __name__ == "__main__":
                     marked_remove.add(t2)
             for t2 in marked_remove:
                 t._tests.remove(t2)
-    if args.for_ed:
+    counters = None
+    if args.count:
+        # Only imported when asked for, and after discovery, so the test
+        # modules' own references are swapped too.
+        import instrumentation
+        instrumentation.enable()
+        counters = instrumentation.stats
+    if args.jobs is not None:
+        from ed_utils.parallel_test_runner import ParallelJSONTestRunner
+
+        if args.for_ed:
+            ParallelJSONTestRunner(jobs=args.jobs, counters=counters).run(suite)
+        else:
+            results = ParallelJSONTestRunner(stream=None, jobs=args.jobs, counters=counters).run(suite)
+            failed = [result for result in results["testcases"] if not result["passed"]]
+            for result in failed:
+                print("FAIL: {}\n{}".format(result["name"], result["feedback"]))
+            print("Ran {} tests: {}".format(
+                len(results["testcases"]),
+                "FAILED (failures={})".format(len(failed)) if failed else "OK",
+            ))
+    elif args.for_ed:
         f = StringIO("")
-        runner = JSONTestRunner(stream=f)
+        runner = JSONTestRunner(stream=f, counters=counters)
         runner.run(suite)
 
         print(f.getvalue())
@@ -1,16 +1,35 @@
 import random
 import unittest
+from bisect import bisect_left
 from ed_utils.decorators import number, visibility
 from ed_utils.timeout import timeout
 
-from threedeebeetree import ThreeDeeBeeTree, BeeNode
-from balancing import make_ordering
+from threedeebeetree import ThreeDeeBeeTree, BeeNode, Point
+from balancing import make_ordering, iter_ordering, balanced_layout
 
 def get_size(node):
     if node is None:
         return 0
     return node.subtree_size
 
+def split_index(points: list[Point]) -> int:
+    """
+        Returns the index of the point that divides the others most evenly,
+        checked directly against every other point, as balanced_layout should pick it.
+    """
+    n = len(points)
+    axes = [sorted(point[axis] for point in points) for axis in range(3)]
+    best_index, best_sides = 0, None
+    for i, point in enumerate(points):
+        sides = []
+        for axis in range(3):
+            below = bisect_left(axes[axis], point[axis])
+            sides.append(max(below, n - 1 - below))
+        sides.sort(reverse=True)
+        if best_sides is None or sides < best_sides:
+            best_index, best_sides = i, sides
+    return best_index
+
 # Testing function to calculate the worst ratio on your 3️⃣🇩🐝🌳
 def collect_worst_ratio(node: BeeNode):
     default = (1, 0, "")
@@ -122,3 +141,96 @@ class TestBalancing(unittest.TestCase):
         
         ratio, smaller, axis = collect_worst_ratio(tdbt.root)
         self.assertLessEqual(ratio, 7, f"Axis {axis} has ratio 1:{ratio}.")
+
+    @timeout()
+    @number("4.3")
+    def test_from_points(self):
+        random.seed(10239123)
+        points = []
+        coords = list(range(10000))
+        random.shuffle(coords)
+        for i in range(3000):
+            point = (coords[3*i], coords[3*i+1], coords[3*i+2])
+            points.append(point)
+
+        tdbt = ThreeDeeBeeTree.from_points(points, list(range(3000)))
+        self.assertEqual(len(tdbt), 3000)
+        self.assertEqual(tdbt.root.subtree_size, 3000)
+        for i, p in enumerate(points):
+            self.assertEqual(tdbt[p], i)
+
+        ratio, smaller, axis = collect_worst_ratio(tdbt.root)
+        self.assertLessEqual(ratio, 7, f"Axis {axis} has ratio 1:{ratio}.")
+
+    @timeout(10)
+    @number("4.4")
+    def test_iter_ordering(self):
+        random.seed(10239123)
+        points = []
+        coords = list(range(10000))
+        random.shuffle(coords)
+        for i in range(3000):
+            point = (coords[3*i], coords[3*i+1], coords[3*i+2])
+            points.append(point)
+
+        for workers in [None, 2]:
+            ordering = list(iter_ordering(points, workers=workers))
+            self.assertEqual(len(ordering), 3000)
+            self.assertSetEqual(set(points), set(ordering))
+
+            tdbt = ThreeDeeBeeTree()
+            for i, p in enumerate(ordering):
+                tdbt[p] = i
+            ratio, smaller, axis = collect_worst_ratio(tdbt.root)
+            self.assertLessEqual(ratio, 7, f"Axis {axis} has ratio 1:{ratio}.")
+
+    @timeout()
+    @number("4.5")
+    def test_balance_report(self):
+        random.seed(5524101)
+        points = set()
+        while len(points) < 2000:
+            points.add(tuple(random.randint(0, 300) for _ in range(3)))
+        # Inserted in order along x, so the tree is only as even as its rebuilds leave it.
+        points = sorted(points)
+        tdbt = ThreeDeeBeeTree()
+        for i, p in enumerate(points):
+            tdbt[p] = i
+
+        report = tdbt.balance_report()
+        ratio, smaller, axis = collect_worst_ratio(tdbt.root)
+        self.assertEqual(report.worst_ratio, ratio)
+        self.assertEqual(report.worst_axis, axis)
+
+        depths = []
+        stack = [(tdbt.root, 0)]
+        while stack:
+            node, depth = stack.pop()
+            depths.append(depth)
+            stack.extend((child, depth + 1) for child in node.children if child is not None)
+        self.assertEqual(report.max_depth, max(depths))
+        self.assertListEqual(report.depth_histogram, [depths.count(d) for d in range(max(depths) + 1)])
+        self.assertAlmostEqual(report.average_path_length, sum(depths) / len(depths) + 1)
+
+        balanced = ThreeDeeBeeTree.from_points(points).balance_report()
+        self.assertLessEqual(balanced.worst_ratio, 7)
+        self.assertLess(balanced.average_path_length, report.average_path_length)
+        self.assertEqual(ThreeDeeBeeTree().balance_report().depth_histogram, [])
+
+    @timeout()
+    @number("4.6")
+    def test_balanced_layout_splits(self):
+        random.seed(6610284)
+        for spread in (1000, 12):
+            # A small spread repeats values along every axis.
+            points = set()
+            while len(points) < 700:
+                points.add(tuple(random.randint(0, spread) for _ in range(3)))
+            points = list(points)
+            layout = balanced_layout(points)
+            self.assertEqual(len(layout), len(points))
+            # In pre-order each subtree's nodes follow its root, so they are the
+            # next size triples; its split must be the one split_index picks.
+            for position, (index, _, size) in enumerate(layout):
+                indices = sorted(i for i, _, _ in layout[position:position + size])
+                self.assertEqual(index, indices[split_index([points[i] for i in indices])])
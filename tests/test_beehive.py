@@ -1,8 +1,19 @@
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
 import unittest
+from unittest import mock
+try:
+    import numpy
+except ImportError:
+    numpy = None
 from ed_utils.decorators import number, visibility
 from ed_utils.timeout import timeout
 
-from beehive import BeehiveSelector, Beehive
+from beehive import BeehiveSelector, Beehive, ShardedBeehiveSelector
 
 class TestBeehiveSelector(unittest.TestCase):
 
@@ -47,3 +58,240 @@ class TestBeehiveSelector(unittest.TestCase):
         for actual, ex in zip(all_emeralds, expected):
             self.assertAlmostEqual(actual, ex, 0)
         
+
+    @timeout()
+    @number("5.2")
+    def test_harvest_many(self):
+        s = BeehiveSelector(5)
+        for hive in [
+            Beehive(15, 12, 13, capacity=40, nutrient_factor=5, volume=15),
+            Beehive(25, 22, 23, capacity=15, nutrient_factor=8, volume=40),
+            Beehive(35, 32, 33, capacity=40, nutrient_factor=3, volume=40),
+            Beehive(45, 42, 43, capacity=1, nutrient_factor=85, volume=10),
+            Beehive(55, 52, 53, capacity=400, nutrient_factor=5000, volume=0),
+        ]:
+            s.add_beehive(hive)
+        self.assertEqual(s.harvest_many(15), 120 * 3 + 85 * 10 + 80 + 75)
+
+        random.seed(4471902)
+        hives = [
+            (random.randint(0, 6), random.randint(0, 9), random.randint(0, 60))
+            for _ in range(40)
+        ]
+        one_by_one, batched = BeehiveSelector(40), BeehiveSelector(40)
+        for i, (capacity, nutrient_factor, volume) in enumerate(hives):
+            one_by_one.add_beehive(Beehive(i, i, i, capacity, nutrient_factor, volume))
+            batched.add_beehive(Beehive(i, i, i, capacity, nutrient_factor, volume))
+        for batch in [1, 7, 50, 3, 200, 1, 400]:
+            expected = sum(one_by_one.harvest_best_beehive() for _ in range(batch))
+            self.assertEqual(batched.harvest_many(batch), expected)
+            self.assertListEqual(
+                sorted((hive.x, hive.volume) for _, _, hive in one_by_one.heap.the_array[1:one_by_one.heap.length + 1]),
+                sorted((hive.x, hive.volume) for _, _, hive in batched.heap.the_array[1:batched.heap.length + 1]),
+            )
+
+    @timeout()
+    @number("5.3")
+    def test_regional(self):
+        random.seed(90210)
+        positions = random.sample([(x, y, z) for x in range(12) for y in range(12) for z in range(12)], 300)
+        hives = [
+            Beehive(x, y, z, capacity=random.randint(0, 6), nutrient_factor=random.randint(0, 9),
+                    volume=random.randint(0, 30))
+            for x, y, z in positions
+        ]
+        s = BeehiveSelector(len(hives))
+        s.set_all_beehives(hives[:200])
+
+        def expected_best(candidates):
+            # Most emeralds, ties going to the hive added first.
+            return max(candidates, key=lambda hive: (hive.emeralds(), -hives.index(hive)))
+
+        for step in range(400):
+            if step == 150:
+                for hive in hives[200:]:
+                    s.add_beehive(hive)
+            tracked = hives[:200] if step < 150 else hives
+            if step % 5 == 0:
+                emeralds = expected_best(tracked).emeralds()
+                self.assertEqual(s.harvest_best_beehive(), emeralds)
+                continue
+            lo = tuple(random.randint(0, 11) for _ in range(3))
+            hi = tuple(value + random.randint(0, 6) for value in lo)
+            inside = [hive for hive in tracked if all(lo[a] <= (hive.x, hive.y, hive.z)[a] <= hi[a] for a in range(3))]
+            if len(inside) == 0:
+                with self.assertRaises(IndexError):
+                    s.harvest_best_in_box(lo, hi)
+                continue
+            best = expected_best(inside)
+            emeralds, volume = best.emeralds(), best.volume
+            self.assertEqual(s.harvest_best_in_box(lo, hi), emeralds)
+            self.assertEqual(best.volume, volume - min(best.capacity, volume))
+
+        for _ in range(20):
+            point = tuple(random.randint(-2, 14) for _ in range(3))
+            by_distance = sorted(
+                ((hive.x - point[0]) ** 2 + (hive.y - point[1]) ** 2 + (hive.z - point[2]) ** 2, i)
+                for i, hive in enumerate(hives))
+            k = random.randint(1, 10)
+            # Only ask for k when the k closest hives are unambiguous.
+            while by_distance[k - 1][0] == by_distance[k][0]:
+                k += 1
+            self.assertIs(s.best_near(point, k), expected_best([hives[i] for _, i in by_distance[:k]]))
+        self.assertIsNone(BeehiveSelector(3).best_near((0, 0, 0), 2))
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    @timeout(10)
+    @number("5.4")
+    def test_columnar(self):
+        random.seed(5512)
+        n = 3000
+        columns = [list(range(n)), [random.randint(0, 50) for _ in range(n)], [random.randint(0, 50) for _ in range(n)],
+                   [random.randint(0, 4) for _ in range(n)], [random.randint(0, 5) for _ in range(n)],
+                   [random.randint(0, 12) for _ in range(n)]]
+        by_list, by_columns = BeehiveSelector(n + 10), BeehiveSelector(n + 10)
+        by_list.set_all_beehives([Beehive(*values) for values in zip(*columns)])
+        by_columns.set_all_beehives_columnar(*(numpy.array(column) for column in columns))
+        # Fewer than every hive have been made into Beehives so far.
+        self.assertLess(len(by_columns.heap), n)
+
+        for step in range(4000):
+            if step == 2000:
+                for i in range(10):
+                    by_list.add_beehive(Beehive(-1 - i, 0, 0, 4, 5, 12))
+                    by_columns.add_beehive(Beehive(-1 - i, 0, 0, 4, 5, 12))
+            if step % 100 == 99:
+                self.assertEqual(by_columns.harvest_many(37), by_list.harvest_many(37))
+            else:
+                self.assertEqual(by_columns.harvest_best_beehive(), by_list.harvest_best_beehive())
+        self.assertEqual(by_columns.harvest_best_in_box((0, 0, 0), (n, 20, 20)),
+                         by_list.harvest_best_in_box((0, 0, 0), (n, 20, 20)))
+
+        # A full selector has no room left, even with most hives still in the reserve.
+        full = BeehiveSelector(n)
+        full.set_all_beehives_columnar(*(numpy.array(column) for column in columns))
+        with self.assertRaises(IndexError):
+            full.add_beehive(Beehive(-1, 0, 0, 4, 5, 12))
+        self.assertEqual(len(full.heap) + len(full.reserve), n)
+
+        with self.assertRaises(IndexError):
+            BeehiveSelector(2).set_all_beehives_columnar(*(numpy.zeros(3) for _ in range(6)))
+        with self.assertRaises(ValueError):
+            BeehiveSelector(4).set_all_beehives_columnar(*(numpy.zeros(3) for _ in range(5)), numpy.zeros(2))
+
+    @timeout(10)
+    @number("5.5")
+    def test_sharded(self):
+        random.seed(3301)
+        stats = [(random.randint(0, 6), random.randint(0, 9), random.randint(0, 60)) for _ in range(200)]
+        plain, sharded = BeehiveSelector(200), ShardedBeehiveSelector(200, shards=6)
+        plain.set_all_beehives([Beehive(i, i, i, *values) for i, values in enumerate(stats)])
+        sharded.set_all_beehives([Beehive(i, i, i, *values) for i, values in enumerate(stats)])
+        for _ in range(500):
+            self.assertEqual(sharded.harvest_best_beehive(), plain.harvest_best_beehive())
+        with self.assertRaises(IndexError):
+            ShardedBeehiveSelector(4).harvest_best_beehive()
+
+        hives = [Beehive(i, i, i, *values) for i, values in enumerate(stats)]
+        initial = [hive.volume for hive in hives]
+        sharded = ShardedBeehiveSelector(len(hives), shards=4)
+        sharded.set_all_beehives(hives[:100])
+        totals = []
+
+        def harvester():
+            totals.append(sum(sharded.harvest_best_beehive() for _ in range(3000)))
+
+        def adder():
+            for hive in hives[100:]:
+                sharded.add_beehive(hive)
+
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)  # switch threads as often as possible
+        try:
+            threads = [threading.Thread(target=harvester) for _ in range(6)] + [threading.Thread(target=adder)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(interval)
+        # Every emerald handed out came out of some hive's volume exactly once.
+        self.assertTrue(all(hive.volume >= 0 for hive in hives))
+        self.assertEqual(sum(totals), sum((before - hive.volume) * hive.nutrient_factor
+                                          for before, hive in zip(initial, hives)))
+
+    @timeout()
+    @number("5.6")
+    def test_checkpoint(self):
+        random.seed(6610)
+        positions = random.sample([(x, y, z) for x in range(10) for y in range(10) for z in range(10)], 150)
+        stats = [(random.randint(0, 6), random.randint(0, 9), random.randint(0, 60)) for _ in positions]
+        hives = [Beehive(*position, *values) for position, values in zip(positions, stats)]
+
+        def state(selector):
+            return [(emeralds, order, selector.hive_at(ref)) for emeralds, order, ref in
+                    selector.heap.the_array[1:selector.heap.length + 1]]
+
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'hives')
+        s = BeehiveSelector(200)
+        s.set_all_beehives(hives[:120])
+        s.harvest_many(40)
+        with mock.patch('os.fsync', wraps=os.fsync) as fsync:
+            s.dump(path)
+            # The checkpoint, the new log and their directory reach the disk.
+            self.assertGreaterEqual(fsync.call_count, 3)
+            fsync.reset_mock()
+            s.harvest_many(3)
+            self.assertGreaterEqual(fsync.call_count, 1)
+            unsynced = BeehiveSelector(200, sync_log=False)
+            unsynced.set_all_beehives(hives[:10])
+            unsynced.dump(os.path.join(directory, 'unsynced'))
+            fsync.reset_mock()
+            unsynced.harvest_many(3)
+            self.assertEqual(fsync.call_count, 0)
+            unsynced.close_log()
+
+        with BeehiveSelector(200) as restored:
+            restored.load(path)
+            self.assertIsNotNone(restored.log)
+        # Leaving the with statement closes the log.
+        self.assertIsNone(restored.log)
+        s.dump(path)
+        restored = BeehiveSelector(200)
+        restored.load(path)
+        # Nothing was logged, so the heap comes back exactly as it was.
+        self.assertEqual(state(restored), state(s))
+        restored.close_log()
+
+        s.harvest_many(25)
+        s.harvest_best_in_box((0, 0, 0), (4, 9, 9))
+        for hive in hives[120:]:
+            s.add_beehive(hive)
+        s.harvest_many(30)
+        with open(path + '.log', 'ab') as log:
+            log.write(b'H' + bytes(5))  # a record cut short by a crash
+        restored = BeehiveSelector(200)
+        restored.load(path)
+        self.assertEqual(sorted((hive.x, hive.y, hive.z, hive.volume) for _, _, hive in state(restored)),
+                         sorted((hive.x, hive.y, hive.z, hive.volume) for _, _, hive in state(s)))
+        s.close_log()
+        # Both carry on alike, and the restored one keeps logging.
+        for _ in range(20):
+            self.assertEqual(restored.harvest_best_beehive(), s.harvest_best_beehive())
+        again = BeehiveSelector(200)
+        again.load(path)
+        self.assertEqual(again.harvest_many(100), restored.harvest_many(100))
+        restored.close_log()
+        again.close_log()
+
+        # A log older than its checkpoint is ignored.
+        shutil.copy(path + '.log', path + '.old')
+        s.dump(path)
+        s.close_log()
+        shutil.copy(path + '.old', path + '.log')
+        restored = BeehiveSelector(200)
+        restored.load(path)
+        self.assertEqual(state(restored), state(s))
+        restored.close_log()
@@ -0,0 +1,46 @@
+import os
+import subprocess
+import sys
+import unittest
+from io import StringIO
+from ed_utils.decorators import number, visibility
+from ed_utils.timeout import timeout
+
+from benchmarks.json_benchmark_runner import JSONBenchmarkRunner
+from benchmarks.suite import BENCHMARKS, DISTRIBUTIONS, run_suite
+
+class TestBenchmarks(unittest.TestCase):
+
+    @timeout(10)
+    @number("7.1")
+    def test_suite_and_baseline(self):
+        results = JSONBenchmarkRunner(stream=StringIO()).run(run_suite([60], repeat=1))
+        self.assertEqual(len(results["benchmarks"]), len(BENCHMARKS) * len(DISTRIBUTIONS))
+        self.assertEqual(results["regressions"], 0)
+        for result in results["benchmarks"]:
+            self.assertTrue(result["ok"])
+            self.assertTrue("seconds" in result or "skipped" in result)
+
+        slower = {"benchmarks": [dict(result, seconds=result["seconds"] * 10)
+                                 for result in results["benchmarks"] if "seconds" in result]}
+        faster = {"benchmarks": [dict(result, seconds=result["seconds"] / 10)
+                                 for result in results["benchmarks"] if "seconds" in result]}
+        heap_results = [result for result in results["benchmarks"] if result["name"].startswith("heap.")]
+        self.assertEqual(JSONBenchmarkRunner(StringIO(), slower).run(heap_results)["regressions"], 0)
+        self.assertEqual(JSONBenchmarkRunner(StringIO(), faster).run(heap_results)["regressions"], len(heap_results))
+
+    @timeout(30)
+    @number("7.2")
+    def test_sorted_trees_and_sizes(self):
+        # Far deeper than the default recursion limit lets a BinarySearchTree go.
+        results = list(run_suite([3000], ["sorted"], "bst.insert", repeat=1))
+        self.assertEqual(len(results), 1)
+        self.assertIn("seconds", results[0])
+        skipped = list(run_suite([10 ** 5], ["sorted"], "bst.insert", repeat=1))
+        self.assertIn("skipped", skipped[0])
+
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        completed = subprocess.run([sys.executable, "run_tests.py", "--bench", "--sizes", "10"],
+                                   cwd=root, capture_output=True, text=True)
+        self.assertEqual(completed.returncode, 2)
+        self.assertIn("--sizes", completed.stderr)
@@ -1,8 +1,10 @@
+import random
 import unittest
 from ed_utils.decorators import number, visibility
 from ed_utils.timeout import timeout
 
 from bst import BinarySearchTree
+from finger_bst import FingerBinarySearchTree
 
 class BSTTest(unittest.TestCase):
 
@@ -77,3 +79,38 @@ class BSTTest(unittest.TestCase):
         kth = BST.kth_smallest(5, BST.root)
         self.assertEqual(kth.key, 95)
         self.assertEqual(kth.item, 1)
+
+    @timeout()
+    @number("1.4")
+    def test_finger_search(self):
+        random.seed(8812)
+        keys = random.sample(range(0, 3000, 3), 800)
+        plain, finger = BinarySearchTree(), FingerBinarySearchTree()
+        for key in keys:
+            plain[key] = key * 2
+            finger[key] = key * 2
+
+        def check(queries):
+            for key in queries:
+                self.assertEqual(key in finger, key in plain)
+                if key in plain:
+                    self.assertEqual(finger[key], plain[key])
+                else:
+                    with self.assertRaises(KeyError):
+                        finger[key]
+
+        check(range(-5, 3005))
+        check(random.sample(range(-5, 3005), 1000))
+        # The finger ends at the node last looked up.
+        finger[keys[10]]
+        self.assertEqual(finger.finger[-1][0].key, keys[10])
+
+        for key in keys[:300]:
+            del plain[key]
+            del finger[key]
+        for key in range(1, 300, 3):
+            plain[key] = key
+            finger[key] = key
+        check(range(-5, 3005))
+        check(random.sample(range(-5, 3005), 1000))
+        self.assertEqual(len(finger), len(plain))
@@ -0,0 +1,111 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+from ed_utils.decorators import number, visibility
+from ed_utils.timeout import timeout
+
+import beehive
+import bst
+import finger_bst
+import heap
+import instrumentation
+from ed_utils.json_test_runner import JSONTestResult
+from ratio import Percentiles
+from threedeebeetree import ThreeDeeBeeTree
+
+class TestInstrumentation(unittest.TestCase):
+
+    # Under run_tests.py --count instrumentation is on throughout, and must stay on.
+    def setUp(self):
+        self.was_enabled = instrumentation.enabled()
+
+    def tearDown(self):
+        if self.was_enabled:
+            instrumentation.enable()
+        else:
+            instrumentation.disable()
+
+    @timeout()
+    @number("8.1")
+    def test_counting(self):
+        with instrumentation.counting() as counts:
+            tree = bst.BinarySearchTree()
+            for key in [50, 30, 70, 20, 40]:
+                tree[key] = key
+            tree[40]
+            # Each walks 50, 30, then 20.
+            tree.kth_smallest(1, tree.root)
+            tree.get_minimal(tree.root)
+            max_heap = heap.MaxHeap(8)
+            for value in [1, 2, 3, 4]:
+                max_heap.add(value)
+            max_heap.get_max()
+            finger = finger_bst.FingerBinarySearchTree()
+            finger[1] = 1
+            finger[2] = 2
+        self.assertIsInstance(tree, instrumentation.InstrumentedBinarySearchTree)
+        # Subclasses of the originals are counted too, through the methods they inherit.
+        self.assertIsInstance(finger, instrumentation.InstrumentedBinarySearchTree)
+        # Inserts visit 0 + 1 + 1 + 2 + 2 nodes, the lookup 3 (50, 30, then 40).
+        self.assertEqual(counts['bst.visits'], 6 + 3 + 3 + 3 + 1)
+        self.assertEqual(counts['bst.comparisons'], (1 + 2 + 1 + 1 + 1 + 2) + (2 + 2 + 1) + 2)
+        self.assertEqual(counts['heap.rises'], 4)
+        self.assertEqual(counts['heap.sinks'], 1)
+        # Instrumentation is as it was, and if it was off the originals are back.
+        self.assertEqual(instrumentation.enabled(), self.was_enabled)
+        if not self.was_enabled:
+            self.assertNotIsInstance(bst.BinarySearchTree(), instrumentation.InstrumentedBinarySearchTree)
+            self.assertIs(finger_bst.FingerBinarySearchTree.__module__, 'finger_bst')
+
+    @timeout()
+    @number("8.2")
+    def test_stats_and_results(self):
+        instrumentation.enable()
+        self.assertIs(heap.MaxHeap, instrumentation.InstrumentedMaxHeap)
+        self.assertTrue(issubclass(beehive.HiveTree, instrumentation.InstrumentedThreeDeeBeeTree))
+        before = instrumentation.stats()
+        percentiles = Percentiles()
+        for point in range(10):
+            percentiles.add_point(point)
+        self.assertEqual(len(percentiles.ratio(10, 10)), 8)
+        tdbt = ThreeDeeBeeTree()
+        for i in range(40):
+            tdbt[(i, i, i)] = i
+        tdbt[(5, 5, 5)]
+        rebuilds = instrumentation.stats()['threedeebeetree.rebuilds']
+        # A bulk build is balanced from the start, so nothing is rebalanced.
+        ThreeDeeBeeTree.from_points([(i, i * 7 % 40, i * 13 % 40) for i in range(40)])
+        self.assertEqual(instrumentation.stats()['threedeebeetree.rebuilds'], rebuilds)
+        after = instrumentation.stats()
+        self.assertEqual(after['percentiles.points'] - before.get('percentiles.points', 0), 8)
+        self.assertGreater(after['threedeebeetree.rebuilds'], before.get('threedeebeetree.rebuilds', 0))
+        self.assertGreater(after['threedeebeetree.visits'], before.get('threedeebeetree.visits', 0))
+
+        results = []
+        result = JSONTestResult(None, True, 1, results, instrumentation.stats)
+        result.startTest(self)
+        heap.MaxHeap(2).add(1)
+        result.addSuccess(self)
+        self.assertEqual(results[0]['counters'], {'heap.rises': 1})
+        instrumentation.disable()
+        self.assertIsNot(heap.MaxHeap, instrumentation.InstrumentedMaxHeap)
+        self.assertFalse(issubclass(beehive.HiveTree, instrumentation.InstrumentedThreeDeeBeeTree))
+
+    @unittest.skipIf(os.environ.get('COUNTING_SUBPROCESS'), "already inside the run it starts")
+    @timeout(60)
+    @number("8.3")
+    def test_run_tests_count(self):
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        # These tests first, then the heap and percentile tests run after them.
+        completed = subprocess.run([sys.executable, 'run_tests.py', '-e', '--count', '(8|9|2)'],
+                                   cwd=root, capture_output=True, text=True,
+                                   env=dict(os.environ, COUNTING_SUBPROCESS='1'))
+        testcases = json.loads(completed.stdout)['testcases']
+        self.assertTrue(all(test['passed'] for test in testcases), completed.stdout)
+        # 9.1 checks the pairing heap against MaxHeap, the 2.x tests use Percentiles.
+        later = [test for test in testcases if test['name'].startswith(('9.1:', '2.'))]
+        self.assertEqual(len(later), 4)
+        for test in later:
+            self.assertNotEqual(test['counters'], {}, test['name'])
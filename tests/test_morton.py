@@ -0,0 +1,68 @@
+import random
+import unittest
+from ed_utils.decorators import number, visibility
+from ed_utils.timeout import timeout
+
+from morton import MortonIndex, morton_encode, morton_decode, OFFSET
+
+class TestMortonIndex(unittest.TestCase):
+
+    @timeout()
+    @number("6.1")
+    def test_codes(self):
+        for point in [(0, 0, 0), (-1, 2, -3), (-OFFSET, OFFSET - 1, 17), (123456, -654321, 999)]:
+            self.assertEqual(morton_decode(morton_encode(point)), point)
+        # The eight unit cubes around the origin come out in octant order.
+        corners = [(x, y, z) for x in (0, 1) for y in (0, 1) for z in (0, 1)]
+        codes = [morton_encode(corner) for corner in corners]
+        self.assertListEqual(codes, sorted(codes))
+        self.assertEqual(codes[-1] - codes[0], 7)
+        with self.assertRaises(ValueError):
+            morton_encode((OFFSET, 0, 0))
+
+    @timeout()
+    @number("6.2")
+    def test_map(self):
+        index = MortonIndex()
+        index[(5, 5, 7)] = "A"
+        index[(-11, 4, -16)] = "B"
+        index[(6, -1, -17)] = "C"
+        self.assertEqual(len(index), 3)
+        self.assertEqual(index[(-11, 4, -16)], "B")
+        self.assertIn((6, -1, -17), index)
+        self.assertNotIn((6, -1, 17), index)
+        with self.assertRaises(KeyError):
+            index[(0, 0, 0)]
+        with self.assertRaises(ValueError):
+            index[(5, 5, 7)] = "D"
+        del index[(5, 5, 7)]
+        self.assertNotIn((5, 5, 7), index)
+        self.assertEqual(len(index), 2)
+
+    @timeout()
+    @number("6.3")
+    def test_query_box(self):
+        random.seed(8812093)
+        points = set()
+        while len(points) < 2000:
+            points.add(tuple(random.randint(-500, 500) for _ in range(3)))
+        points = list(points)
+        index = MortonIndex.from_points(points, list(range(len(points))))
+        for i, point in enumerate(points):
+            self.assertEqual(index[point], i)
+
+        boxes = [((-500, -500, -500), (500, 500, 500)), ((-30, -60, 0), (40, 10, 90)), ((0, 0, 0), (0, 0, 0))]
+        for _ in range(20):
+            corners = [sorted(random.randint(-600, 600) for _ in range(2)) for _ in range(3)]
+            boxes.append((tuple(c[0] for c in corners), tuple(c[1] for c in corners)))
+        for lo, hi in boxes:
+            expected = {
+                (point, index[point]) for point in points
+                if all(lo[axis] <= point[axis] <= hi[axis] for axis in range(3))
+            }
+            found = list(index.query_box(lo, hi))
+            self.assertEqual(len(found), len(expected))
+            self.assertSetEqual(set(found), expected)
+
+        with self.assertRaises(ValueError):
+            MortonIndex.from_points(points + points[:1])
@@ -0,0 +1,54 @@
+import random
+import unittest
+from ed_utils.decorators import number, visibility
+from ed_utils.timeout import timeout
+
+from heap import MaxHeap
+from pairing_heap import PairingMaxHeap
+
+class TestPairingMaxHeap(unittest.TestCase):
+
+    @timeout()
+    @number("9.1")
+    def test_against_max_heap(self):
+        random.seed(4091)
+        pairing, array_heap = PairingMaxHeap(), MaxHeap(2000)
+        for _ in range(3000):
+            if len(array_heap) > 0 and random.random() < 0.4:
+                self.assertEqual(pairing.peek_max(), array_heap.peek_max())
+                self.assertEqual(pairing.get_max(), array_heap.get_max())
+            else:
+                value = random.randint(0, 500)
+                pairing.add(value)
+                array_heap.add(value)
+            self.assertEqual(len(pairing), len(array_heap))
+        while len(array_heap) > 0:
+            self.assertEqual(pairing.get_max(), array_heap.get_max())
+        self.assertTrue(pairing.is_empty())
+        with self.assertRaises(IndexError):
+            pairing.get_max()
+
+    @timeout()
+    @number("9.2")
+    def test_merge(self):
+        random.seed(5120)
+        workers = [PairingMaxHeap() for _ in range(6)]
+        everything = []
+        for worker in workers:
+            for _ in range(random.randint(0, 200)):
+                value = random.random()
+                worker.add(value)
+                everything.append(value)
+        # Some nodes get recycled before merging.
+        for worker in workers[:3]:
+            if len(worker) > 0:
+                everything.remove(worker.get_max())
+
+        merged = PairingMaxHeap()
+        for worker in workers:
+            merged.merge(worker)
+            self.assertEqual(len(worker), 0)
+        with self.assertRaises(ValueError):
+            merged.merge(merged)
+        self.assertEqual(len(merged), len(everything))
+        self.assertEqual([merged.get_max() for _ in range(len(everything))], sorted(everything, reverse=True))
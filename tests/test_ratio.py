@@ -39,4 +39,41 @@ class RatioTest(unittest.TestCase):
 
         p.remove_point(82)
         res = p.ratio(13, 10)
-        self.assertSetEqual(set(res), {14, 15, 16, 87, 91})
\ No newline at end of file
+        self.assertSetEqual(set(res), {14, 15, 16, 87, 91})
+
+    @timeout()
+    @number("2.3")
+    def test_track(self):
+        random.seed(5512093)
+        p = Percentiles()
+        early = p.track(50)
+        self.assertIsNone(early.value)
+        points = []
+        for point in random.sample(range(1000), 200):
+            p.add_point(point)
+            points.append(point)
+        trackers = [early] + [p.track(q) for q in (0, 90, 99, 100)]
+
+        for _ in range(600):
+            if len(points) > 0 and random.random() < 0.5:
+                point = points.pop(random.randrange(len(points)))
+                p.remove_point(point)
+            else:
+                point = random.choice([x for x in range(1000) if x not in points])
+                p.add_point(point)
+                points.append(point)
+            ordered = sorted(points)
+            for tracker in trackers:
+                if len(ordered) == 0:
+                    self.assertIsNone(tracker.value)
+                else:
+                    rank = max(1, -(-tracker.p * len(ordered) // 100))
+                    self.assertEqual(tracker.value, ordered[rank - 1])
+
+        p.untrack(early)
+        self.assertNotIn(early, p.trackers)
+
+        for bad in (-1, 100.5, 150):
+            with self.assertRaises(ValueError):
+                p.track(bad)
+        self.assertEqual(len(p.trackers), 4)
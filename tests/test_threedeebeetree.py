@@ -1,9 +1,27 @@
+import random
 import unittest
 from ed_utils.decorators import number, visibility
 from ed_utils.timeout import timeout
 
 from threedeebeetree import ThreeDeeBeeTree
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+def check_sizes(test, node):
+    """ Asserts every subtree_size below node is right, returning (size, height). """
+    if node is None:
+        return 0, 0
+    size, height = int(node.live), 1
+    for child in node.children:
+        child_size, child_height = check_sizes(test, child)
+        size += child_size
+        height = max(height, child_height + 1)
+    test.assertEqual(node.subtree_size, size)
+    return size, height
+
 class TestThreeDeeBeeTree(unittest.TestCase):
 
     TESTING_POINTS = [
@@ -64,3 +82,246 @@ class TestThreeDeeBeeTree(unittest.TestCase):
         
         self.assertEqual(tdbt.get_tree_node_by_key((16, 0, -14)).item, 7)
         self.assertEqual(tdbt.get_tree_node_by_key((6, -1, -17)).item, 0)
+
+    @timeout()
+    @number("3.4")
+    def test_query_box(self):
+        random.seed(4710293)
+        tdbt = ThreeDeeBeeTree()
+        points = set()
+        while len(points) < 500:
+            points.add(tuple(random.randint(-50, 50) for _ in range(3)))
+        for i, point in enumerate(points):
+            tdbt[point] = i
+
+        lo, hi = (-20, -5, 0), (10, 30, 25)
+        expected = {
+            (point, tdbt[point]) for point in points
+            if all(lo[axis] <= point[axis] <= hi[axis] for axis in range(3))
+        }
+        self.assertSetEqual(set(tdbt.query_box(lo, hi)), expected)
+
+        self.assertListEqual(list(tdbt.query_box((60, 60, 60), (70, 70, 70))), [])
+        point = next(iter(points))
+        self.assertListEqual(list(tdbt.query_box(point, point)), [(point, tdbt[point])])
+
+    @timeout()
+    @number("3.5")
+    def test_nearest_and_radius(self):
+        random.seed(2019384)
+        tdbt = ThreeDeeBeeTree()
+        points = set()
+        while len(points) < 500:
+            points.add(tuple(random.randint(-50, 50) for _ in range(3)))
+        for i, point in enumerate(points):
+            tdbt[point] = i
+
+        def dist(a, b):
+            return sum((a[axis] - b[axis]) ** 2 for axis in range(3))
+
+        target = (3, -7, 12)
+        by_distance = sorted(points, key=lambda point: dist(point, target))
+        found = tdbt.nearest(target, 10)
+        self.assertEqual(len(found), 10)
+        self.assertListEqual(
+            [dist(key, target) for key, _ in found],
+            [dist(point, target) for point in by_distance[:10]],
+        )
+        for key, item in found:
+            self.assertEqual(tdbt[key], item)
+        self.assertEqual(len(tdbt.nearest(target, 1000)), 500)
+
+        inside = tdbt.within_radius(target, 15)
+        self.assertSetEqual(
+            {key for key, _ in inside},
+            {point for point in points if dist(point, target) <= 15 ** 2},
+        )
+        self.assertListEqual(inside, sorted(inside, key=lambda pair: dist(pair[0], target)))
+        self.assertListEqual(tdbt.within_radius(target, 0), [])
+        with self.assertRaises(ValueError):
+            tdbt.within_radius(target, -15)
+
+    @timeout()
+    @number("3.6")
+    def test_delete(self):
+        tdbt = ThreeDeeBeeTree()
+        for i, point in enumerate(self.TESTING_POINTS):
+            tdbt[point] = i
+
+        del tdbt[(6, -1, -17)]
+        del tdbt[(-14, 18, -4)]
+        self.assertEqual(len(tdbt), 8)
+        self.assertNotIn((6, -1, -17), tdbt)
+        self.assertNotIn((-14, 18, -4), tdbt)
+        for i, point in enumerate(self.TESTING_POINTS):
+            if point not in [(6, -1, -17), (-14, 18, -4)]:
+                self.assertEqual(tdbt[point], i)
+        check_sizes(self, tdbt.root)
+        with self.assertRaises(ValueError):
+            del tdbt[(6, -1, -17)]
+
+    @timeout()
+    @number("3.7")
+    def test_rebuilds_under_churn(self):
+        random.seed(9912873)
+        tdbt = ThreeDeeBeeTree()
+        # Sorted inserts would otherwise form a single chain of octants.
+        points = [(i, 2 * i, 3 * i) for i in range(2000)]
+        for point in points:
+            tdbt[point] = point
+        size, height = check_sizes(self, tdbt.root)
+        self.assertEqual(size, 2000)
+        self.assertLessEqual(height, tdbt.depth_limit() + 1)
+
+        random.shuffle(points)
+        for point in points[:1500]:
+            del tdbt[point]
+        size, height = check_sizes(self, tdbt.root)
+        self.assertEqual(size, 500)
+        self.assertEqual(len(tdbt), 500)
+        self.assertLessEqual(height, tdbt.depth_limit() + 1)
+        for point in points[1500:]:
+            self.assertEqual(tdbt[point], point)
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    @timeout()
+    @number("3.8")
+    def test_freeze(self):
+        random.seed(5520391)
+        points = set()
+        while len(points) < 1000:
+            points.add(tuple(random.randint(-100, 100) for _ in range(3)))
+        points = list(points)
+        tdbt = ThreeDeeBeeTree.from_points(points[:800], list(range(800)))
+        frozen = tdbt.freeze()
+        self.assertEqual(len(frozen), 800)
+        self.assertEqual(frozen.subtree_sizes[0], 800)
+
+        queries = numpy.array(points)
+        contained = frozen.contains_many(queries)
+        self.assertListEqual(contained.tolist(), [point in tdbt for point in points])
+        self.assertListEqual(frozen.get_many(queries[:800]), list(range(800)))
+        with self.assertRaises(KeyError):
+            frozen.get_many(queries[790:810])
+        self.assertListEqual(ThreeDeeBeeTree().freeze().contains_many(queries).tolist(), [False] * 1000)
+
+    @timeout(10)
+    @number("3.9")
+    def test_build_parallel(self):
+        random.seed(3319847)
+        points = set()
+        while len(points) < 3000:
+            points.add(tuple(random.randint(-1000, 1000) for _ in range(3)))
+        points = list(points)
+
+        tdbt = ThreeDeeBeeTree.build_parallel(points, list(range(3000)), workers=2)
+        self.assertEqual(len(tdbt), 3000)
+        self.assertEqual(check_sizes(self, tdbt.root)[0], 3000)
+        for i, point in enumerate(points):
+            self.assertEqual(tdbt[point], i)
+        serial = ThreeDeeBeeTree.from_points(points, list(range(3000)))
+        self.assertListEqual(tdbt.collect(tdbt.root), serial.collect(serial.root))
+
+        with self.assertRaises(ValueError):
+            ThreeDeeBeeTree.build_parallel(points + points[:1], workers=2)
+
+    @timeout()
+    @number("3.10")
+    def test_count_box(self):
+        random.seed(7781234)
+        points = set()
+        while len(points) < 1000:
+            points.add(tuple(random.randint(-100, 100) for _ in range(3)))
+        points = list(points)
+        inserted = ThreeDeeBeeTree()
+        for i, point in enumerate(points):
+            inserted[point] = i
+        built = ThreeDeeBeeTree.from_points(points)
+        for point in points[:300]:
+            del inserted[point]
+
+        boxes = [((-100, -100, -100), (100, 100, 100)), ((-30, -60, 0), (40, 10, 90)), ((5, 5, 5), (5, 5, 5))]
+        for _ in range(20):
+            corners = [sorted(random.randint(-120, 120) for _ in range(2)) for _ in range(3)]
+            boxes.append((tuple(c[0] for c in corners), tuple(c[1] for c in corners)))
+        for lo, hi in boxes:
+            self.assertEqual(built.count_box(lo, hi), len(list(built.query_box(lo, hi))))
+            self.assertEqual(inserted.count_box(lo, hi), len(list(inserted.query_box(lo, hi))))
+        self.assertEqual(built.count_box((-100, -100, -100), (100, 100, 100)), 1000)
+        self.assertEqual(ThreeDeeBeeTree().count_box((0, 0, 0), (1, 1, 1)), 0)
+
+    @timeout()
+    @number("3.11")
+    def test_balance_ratio(self):
+        random.seed(4417302)
+        points = set()
+        while len(points) < 1500:
+            points.add(tuple(random.randint(0, 300) for _ in range(3)))
+        # Sorted by x, which skews the per-axis ratio without bound unless rebuilt.
+        points = sorted(points)
+        for ratio in (7, 2):
+            tdbt = ThreeDeeBeeTree(balance_ratio=ratio)
+            for point in points:
+                tdbt[point] = point
+                # No insert leaves its key deeper than the depth limit.
+                self.assertLessEqual(len(tdbt.search_path(point)) - 1, tdbt.depth_limit())
+            check_sizes(self, tdbt.root)
+            if ratio == 7:
+                # Rebuilt subtrees may sit a little above a tight ratio until they
+                # have grown by half, but 7 is well above what a rebuild leaves.
+                self.assertLessEqual(tdbt.balance_report().worst_ratio, ratio)
+
+            # A delete leaves no node on the deleted key's path with one octant
+            # outweighing the rest of its subtree by more than the ratio.
+            for point in points[::3]:
+                del tdbt[point]
+                for node in tdbt.search_path(point):
+                    if not tdbt.is_leaf(node):
+                        heaviest = max(child.subtree_size for child in node.children if child is not None)
+                        self.assertLessEqual(heaviest, ratio * (node.subtree_size - heaviest))
+            check_sizes(self, tdbt.root)
+
+    @timeout()
+    @number("3.12")
+    def test_delete_leaves_dead_nodes(self):
+        random.seed(3390127)
+        points = set()
+        while len(points) < 400:
+            points.add(tuple(random.randint(-100, 100) for _ in range(3)))
+        points = list(points)
+        tdbt = ThreeDeeBeeTree.from_points(points, list(range(400)))
+        # Deleting the root and the keys around it only marks them dead, so the
+        # tree above them stays put.
+        root = tdbt.root
+        deleted = [key for key, _ in tdbt.nearest(root.key, 30)]
+        for key in deleted:
+            del tdbt[key]
+        self.assertIs(tdbt.root, root)
+        self.assertFalse(root.live)
+        self.assertEqual(len(tdbt), 400 - len(deleted))
+        check_sizes(self, tdbt.root)
+        for key in deleted:
+            self.assertNotIn(key, tdbt)
+            with self.assertRaises(ValueError):
+                del tdbt[key]
+        everything = ((-100, -100, -100), (100, 100, 100))
+        self.assertEqual(len(list(tdbt.query_box(*everything))), len(tdbt))
+        self.assertEqual(tdbt.count_box(*everything), len(tdbt))
+        self.assertNotIn(root.key, [key for key, _ in tdbt.nearest(root.key, 5)])
+        self.assertNotIn(root.key, [key for key, _ in tdbt.within_radius(root.key, 30)])
+        if numpy is not None:
+            self.assertFalse(tdbt.freeze().contains_many(numpy.array(deleted)).any())
+
+        # A deleted key comes back to life where it was.
+        tdbt[root.key] = 'back'
+        self.assertTrue(root.live)
+        self.assertEqual(tdbt[root.key], 'back')
+        check_sizes(self, tdbt.root)
+
+        # With more dead nodes than live ones the tree is rebuilt without them.
+        for key in points:
+            if key in tdbt and len(tdbt) > 150:
+                del tdbt[key]
+        self.assertLessEqual(tdbt.dead, len(tdbt))
+        size, _ = check_sizes(self, tdbt.root)
+        self.assertEqual(size, len(tdbt))
@@ -1,9 +1,100 @@
 from __future__ import annotations
-from typing import Generic, TypeVar, Tuple
+from typing import Callable, Generic, TypeVar, Tuple, Iterator, Sequence
 from dataclasses import dataclass, field
+from array import array
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from itertools import count
+from math import log
+import gc
+import heapq
+import os
+from heap import MaxHeap
 
 I = TypeVar('I')
 Point = Tuple[int, int, int]
+# 3-bit code with bit 2, 1, 0 set when the point is on or above the node's key
+# along x, y, z respectively; it indexes the node's children directly.
+Octant = int
+OCTANTS = 8
+# Inclusive (lowest corner, highest corner) of the space an octant can hold.
+Region = Tuple[Tuple[float, float, float], Tuple[float, float, float]]
+
+UNBOUNDED: Region = ((-float('inf'),) * 3, (float('inf'),) * 3)
+# Splits where both sides hold fewer points than this are never judged lopsided,
+# as the balancing tests leave them out; too few points to split evenly.
+MIN_SIDE = 19
+
+
+def child_region(region: Region, key: Point, octant: Octant) -> Region:
+    """ Narrows region down to the given octant of a node with the given key. """
+    lo, hi = list(region[0]), list(region[1])
+    for axis in range(3):
+        if octant >> (2 - axis) & 1:
+            lo[axis] = key[axis]
+        else:
+            # Keys are integers, so "strictly below" is "at most one less".
+            hi[axis] = key[axis] - 1
+    return tuple(lo), tuple(hi)
+
+
+def bounding_region(points: list[Point]) -> Region:
+    """ The smallest region holding every one of the points. """
+    if len(points) == 0:
+        return UNBOUNDED
+    return tuple(min(point[axis] for point in points) for axis in range(3)), \
+        tuple(max(point[axis] for point in points) for axis in range(3))
+
+
+def region_meets(region: Region, lo: Point, hi: Point) -> bool:
+    """ Checks whether region and the box with corners lo and hi overlap. """
+    return all(lo[axis] <= region[1][axis] and region[0][axis] <= hi[axis] for axis in range(3))
+
+
+def distance_squared(a: Point, b: Point) -> int:
+    return (a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2 + (a[2] - b[2]) ** 2
+
+
+def gap_squared(point: Point, region: Region) -> float:
+    """ Squared distance from point to the closest position inside region. """
+    total = 0
+    for axis in range(3):
+        if point[axis] < region[0][axis]:
+            total += (region[0][axis] - point[axis]) ** 2
+        elif point[axis] > region[1][axis]:
+            total += (point[axis] - region[1][axis]) ** 2
+    return total
+
+
+@contextmanager
+def gc_paused() -> Iterator[None]:
+    """
+        Pauses the cyclic garbage collector for a bulk build. Otherwise every
+        so many allocations it walks all the nodes made so far again, which
+        takes most of a large build's time; trees hold no cycles for it to find.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def plan_subtree(points: list[Point]) -> array:
+    """
+        Worker half of ThreeDeeBeeTree.build_parallel: lays out the balanced
+        subtree over points, flattened into one array of int64 triples.
+    """
+    from balancing import balanced_layout  # balancing imports this module
+
+    try:
+        with gc_paused():
+            layout = balanced_layout(points)
+    except ValueError:
+        raise ValueError('Inserting duplicate item')
+    return array('q', [value for triple in layout for value in triple])
 
 @dataclass
 class BeeNode:
@@ -11,20 +102,61 @@ class BeeNode:
     key: Point
     item: I
     subtree_size: int = 1
+    children: list[BeeNode | None] = field(default_factory=lambda: [None] * OCTANTS)
+    # ThreeDeeBeeTree.is_lopsided takes the node as it is until subtree_size reaches this.
+    check_at: int = 0
+    # A deleted node left in place to route searches; subtree_size leaves it out.
+    live: bool = True
+
+    def octant_for(self, point: Point) -> Octant:
+        """ Returns the octant of this node that the point falls into. """
+        key = self.key
+        return (point[0] >= key[0]) << 2 | (point[1] >= key[1]) << 1 | (point[2] >= key[2])
 
     def get_child_for_key(self, point: Point) -> BeeNode | None:
-        raise NotImplementedError()
+        return self.children[self.octant_for(point)]
+
+
+@dataclass
+class BalanceReport:
+    """ Shape of a ThreeDeeBeeTree, as measured by ThreeDeeBeeTree.balance_report. """
+
+    # Largest ratio between the two sides of any node's split along one axis.
+    worst_ratio: float = 1
+    worst_key: Point | None = None
+    worst_axis: str = ''
+    # The root has depth 0, and depth_histogram[d] nodes lie at depth d.
+    max_depth: int = 0
+    depth_histogram: list[int] = field(default_factory=list)
+    # Mean number of nodes visited to find a key in the tree.
+    average_path_length: float = 0
 
 
 class ThreeDeeBeeTree(Generic[I]):
     """ 3️⃣🇩🐝🌳 tree. """
 
-    def __init__(self) -> None:
+    # Subclasses needing extra data per node can swap in a BeeNode subclass.
+    node_type = BeeNode
+
+    def __init__(self, balance_ratio: float = 7) -> None:
         """
             Initialises an empty 3DBT
+            Every insert rebuilds the highest node on its path that is_lopsided,
+            so the per-axis ratio measured by balance_report stays within
+            balance_ratio wherever a rebuild can bring it there, even for points
+            inserted in order along one axis. A subtree also counts as unbalanced
+            once one of its octants holds more than balance_ratio times as many
+            points as the rest of it together; inserts landing deeper than
+            depth_limit() and deletes rebuild the closest such subtree on their path.
         """
         self.root = None
         self.length = 0
+        # Nodes deleted but left in place since the last full rebuild; some may
+        # since have gone in rebuilds of their subtrees.
+        self.dead = 0
+        self.balance_ratio = balance_ratio
+        # Holds every key ever inserted; deletions may leave it larger than needed.
+        self.bounds = UNBOUNDED
 
     def is_empty(self) -> bool:
         """
@@ -55,20 +187,520 @@ class ThreeDeeBeeTree(Generic[I]):
         return node.item
 
     def get_tree_node_by_key(self, key: Point) -> BeeNode:
-        raise NotImplementedError()
+        """
+            Finds the node holding key by walking down from the root.
+            :complexity best: O(1) finds the key at the root
+            :complexity worst: O(D) key is not found, where D is the depth of the tree
+        """
+        x, y, z = key
+        current = self.root
+        while current is not None:
+            node_key = current.key
+            if key == node_key:
+                if current.live:
+                    return current
+                break
+            current = current.children[(x >= node_key[0]) << 2 | (y >= node_key[1]) << 1 | (z >= node_key[2])]
+        raise KeyError('Key not found: {0}'.format(key))
 
     def __setitem__(self, key: Point, item: I) -> None:
-        self.root = self.insert_aux(self.root, key, item)
+        path = self.insert_aux(key, item)
+        if self.rebuild_first_unbalanced(path, key, unbalanced=self.is_lopsided) is not None:
+            return
+        if len(path) - 1 > self.depth_limit():
+            # Some ancestor must be unbalanced; rebuild the closest one.
+            self.rebuild_first_unbalanced(path, key, deepest_first=True)
 
-    def insert_aux(self, current: BeeNode, key: Point, item: I) -> BeeNode:
+    def insert_aux(self, key: Point, item: I) -> list[BeeNode]:
         """
             Attempts to insert an item into the tree, it uses the Key to insert it
+            Returns the search path from the root down to the new node, which is
+            the key's dead node brought back to life if it has one.
+            :complexity best: O(1) inserts the item at the root.
+            :complexity worst: O(D) inserting at the bottom of the tree
+            where D is the depth of the tree
+        """
+        path = self.search_path(key)
+        if len(path) > 0 and path[-1].key == key:
+            if path[-1].live:
+                raise ValueError('Inserting duplicate item')
+            path[-1].live, path[-1].item = True, item
+            for current in path:
+                current.subtree_size += 1
+        else:
+            node = self.node_type(key, item=item)
+            if len(path) == 0:
+                self.root = node
+            else:
+                for current in path:
+                    current.subtree_size += 1
+                parent = path[-1]
+                parent.children[parent.octant_for(key)] = node
+            path.append(node)
+        self.length += 1
+        self.widen_bounds(key)
+        return path
+
+    def __delitem__(self, key: Point) -> None:
+        """
+            Deletes key from the tree.
+            A deleted node with at most one octant is replaced by that octant;
+            otherwise it stays in place, dead, to route searches into its octants.
+            Only the closest unbalanced subtree on the key's path is rebuilt, if
+            any, until there are more dead nodes than live ones and the whole
+            tree is rebuilt without them.
+            :complexity: O(D) where D is the depth of the node, plus the rebuilds:
+            a whole rebuild is O(N log² N) but follows at least N/2 deletes
+        """
+        path = self.search_path(key)
+        if len(path) == 0 or path[-1].key != key or not path[-1].live:
+            raise ValueError('Deleting non-existent item')
+        for current in path:
+            current.subtree_size -= 1
+            # Shrinking sides can tip a node sooner than is_lopsided planned for.
+            current.check_at = 0
+        node = path[-1]
+        node.live, node.item = False, None
+        self.length -= 1
+        # Splices out the node, and any dead ancestors left with a single octant.
+        while len(path) > 0 and not path[-1].live:
+            remaining = [child for child in path[-1].children if child is not None]
+            if len(remaining) > 1:
+                break
+            path.pop()
+            replacement = remaining[0] if len(remaining) == 1 else None
+            if len(path) == 0:
+                self.root = replacement
+            else:
+                parent = path[-1]
+                parent.children[parent.octant_for(key)] = replacement
+        if len(path) > 0 and path[-1] is node:
+            self.dead += 1
+        if self.dead > self.length:
+            self.root = None if self.root is None else self.build_balanced(self.collect(self.root))
+            self.dead = 0
+        else:
+            self.rebuild_first_unbalanced(path, key)
+
+    def widen_bounds(self, key: Point) -> None:
+        """ Grows bounds to hold key, leaving it alone when key already lies inside. """
+        x, y, z = key
+        if self.length == 1:
+            self.bounds = (x, y, z), (x, y, z)
+            return
+        lo, hi = self.bounds
+        if lo[0] <= x <= hi[0] and lo[1] <= y <= hi[1] and lo[2] <= z <= hi[2]:
+            return
+        self.bounds = (min(lo[0], x), min(lo[1], y), min(lo[2], z)), \
+            (max(hi[0], x), max(hi[1], y), max(hi[2], z))
+
+    def is_unbalanced(self, current: BeeNode) -> bool:
+        """
+            Checks whether one octant of current holds more than balance_ratio
+            times as many points as the rest of its subtree, whichever axes they
+            differ along.
+        """
+        heaviest = max(child.subtree_size for child in current.children if child is not None)
+        return heaviest > self.balance_ratio * (current.subtree_size - heaviest)
+
+    def is_lopsided(self, current: BeeNode) -> bool:
         """
-        raise NotImplementedError()
+            Checks whether, along some axis, one side of current holds more than
+            balance_ratio times as many points as the other, as balance_report
+            measures it. Nothing is measured until subtree_size reaches check_at:
+            a node found balanced sets it to the fewest inserts that could tip
+            it over, and a rebuilt node waits until it has grown by half, since
+            where repeated coordinates keep a rebuild from evening out an axis
+            rebuilding again on every insert would not help either.
+        """
+        size = current.subtree_size
+        if size < current.check_at:
+            return False
+        splitting = current.live
+        sizes = [0 if child is None else child.subtree_size for child in current.children]
+        waits = []
+        # Octants on or above the key along x, then y, then z.
+        for above in (sizes[4] + sizes[5] + sizes[6] + sizes[7],
+                      sizes[2] + sizes[3] + sizes[6] + sizes[7],
+                      sizes[1] + sizes[3] + sizes[5] + sizes[7]):
+            below = size - splitting - above
+            larger, smaller = (above, below) if above > below else (below, above)
+            if larger >= MIN_SIDE and larger > self.balance_ratio * smaller:
+                return True
+            waits.append(max(int(self.balance_ratio * smaller - larger) + 1, MIN_SIDE - larger))
+        current.check_at = size + min(waits)
+        return False
+
+    def depth_limit(self) -> float:
+        """
+            The depth no node can exceed while every subtree is balanced, since each
+            octant then holds at most balance_ratio / (balance_ratio + 1) of its parent.
+        """
+        return log(max(self.length, 1), (self.balance_ratio + 1) / self.balance_ratio)
+
+    def search_path(self, key: Point) -> list[BeeNode]:
+        """ Returns the nodes visited when searching for key, starting at the root. """
+        x, y, z = key
+        path = []
+        current = self.root
+        while current is not None:
+            path.append(current)
+            node_key = current.key
+            if key == node_key:
+                break
+            current = current.children[(x >= node_key[0]) << 2 | (y >= node_key[1]) << 1 | (z >= node_key[2])]
+        return path
+
+    def rebuild_first_unbalanced(self, path: list[BeeNode], key: Point, deepest_first: bool = False,
+                                 unbalanced: Callable[[BeeNode], bool] | None = None) -> BeeNode | None:
+        """
+            Rebuilds the highest (or deepest) unbalanced node on path, the search
+            path for key from the root, judged by unbalanced (is_unbalanced if not
+            given). Only subtrees on that path change size during an insert or
+            delete, so nothing else can have become unbalanced.
+            Returns the root of the rebuilt subtree, or None if all were balanced.
+        """
+        unbalanced = unbalanced or self.is_unbalanced
+        depths = range(len(path) - 1, -1, -1) if deepest_first else range(len(path))
+        for depth in depths:
+            current = path[depth]
+            if current.subtree_size > 1 and unbalanced(current):
+                rebuilt = self.build_balanced(self.collect(current))
+                if depth == 0:
+                    self.root = rebuilt
+                else:
+                    parent = path[depth - 1]
+                    parent.children[parent.octant_for(key)] = rebuilt
+                return rebuilt
+        return None
+
+    def collect(self, current: BeeNode) -> list[tuple[Point, I]]:
+        """
+            Returns every (key, item) pair in the subtree rooted at current,
+            current first, leaving out dead nodes.
+        """
+        pairs = []
+        stack = [current]
+        while stack:
+            node = stack.pop()
+            if node.live:
+                pairs.append((node.key, node.item))
+            stack.extend(child for child in node.children if child is not None)
+        return pairs
+
+    def build_balanced(self, pairs: list[tuple[Point, I]]) -> BeeNode | None:
+        """
+            Builds a detached, balanced subtree out of the given (key, item) pairs.
+            Every subtree_size is known from the layout as soon as its node is made,
+            so no point is ever inserted from the top.
+            :complexity: O(N log² N) where N is the number of pairs
+        """
+        from balancing import balanced_layout  # balancing imports this module
+
+        keys = [key for key, _ in pairs]
+        with gc_paused():
+            try:
+                layout = balanced_layout(keys)
+            except ValueError:
+                raise ValueError('Inserting duplicate item')
+            return self.build_from_layout(keys, [item for _, item in pairs], layout)
+
+    def build_from_layout(self, keys: list[Point], items: list[I],
+                          layout: Sequence[tuple[int, int, int]]) -> BeeNode | None:
+        """
+            Builds the detached subtree described by a balancing.balanced_layout of keys.
+            :complexity: O(N) where N is the number of keys
+        """
+        root = None
+        stack = []  # [node, descendants still to attach] along the current branch
+        for index, octant, size in layout:
+            node = self.node_type(keys[index], items[index], subtree_size=size, check_at=size + size // 2)
+            while len(stack) > 0 and stack[-1][1] == 0:
+                stack.pop()
+            if len(stack) == 0:
+                root = node
+            else:
+                stack[-1][0].children[octant] = node
+                stack[-1][1] -= size
+            stack.append([node, size - 1])
+        return root
+
+    @classmethod
+    def from_points(cls, points: list[Point], items: list[I] | None = None) -> ThreeDeeBeeTree[I]:
+        """
+            Builds a balanced tree holding the given points in one go.
+            items[i] is stored under points[i]; every item is None if items is not given.
+            :complexity: O(N log² N) where N is the number of points
+        """
+        if items is None:
+            items = [None] * len(points)
+        elif len(items) != len(points):
+            raise ValueError('Expected one item per point')
+        tree = cls()
+        tree.root = tree.build_balanced(list(zip(points, items)))
+        tree.length = len(points)
+        tree.bounds = bounding_region(points)
+        return tree
+
+    @classmethod
+    def build_parallel(cls, points: list[Point], items: list[I] | None = None,
+                       workers: int | None = None) -> ThreeDeeBeeTree[I]:
+        """
+            Builds the same balanced tree as from_points using several processes.
+            The top levels are split here until there are a couple of independent
+            octants per worker; each worker lays out one octant's subtree and sends
+            back only its compact layout, which is grafted in below its parent
+            while the other workers carry on.
+            Splitting the top levels and grafting stay serial, which caps the
+            speedup on 8 workers at about 3x (2.7x to 3.1x at 2 * 10^5 points);
+            benchmarks/bench_build_parallel.py measures the cap.
+            :complexity: O(N log² N) work where N is the number of points, all but
+            the O(N log N) top levels and grafting spread over the workers
+        """
+        if items is None:
+            items = [None] * len(points)
+        elif len(items) != len(points):
+            raise ValueError('Expected one item per point')
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers <= 1 or len(points) == 0:
+            return cls.from_points(points, items)
+
+        levels = 1
+        while OCTANTS ** levels < 2 * workers:
+            levels += 1
+
+        tree = cls()
+        tree.length = len(points)
+        tree.bounds = bounding_region(points)
+        with gc_paused():
+            tasks = tree.split_top_levels(points, items, levels)
+        # Largest subtrees first, so no worker is left with a big one at the end.
+        tasks.sort(key=lambda task: len(task[2]), reverse=True)
+        with ProcessPoolExecutor(max_workers=workers) as pool, gc_paused():
+            futures = {}
+            for task in tasks:
+                futures[pool.submit(plan_subtree, [points[i] for i in task[2]])] = task
+            for future in as_completed(futures):
+                parent, octant, indices = futures[future]
+                flat_layout = future.result()
+                layout = zip(flat_layout[0::3], flat_layout[1::3], flat_layout[2::3])
+                parent.children[octant] = tree.build_from_layout(
+                    [points[i] for i in indices], [items[i] for i in indices], layout)
+        return tree
+
+    def split_top_levels(self, points: list[Point], items: list[I],
+                         levels: int) -> list[tuple[BeeNode | None, Octant, list[int]]]:
+        """
+            The serial half of build_parallel: makes this tree's nodes down to the
+            given number of levels, split as from_points would split them, and
+            returns the (parent, octant, indices into points) of every subtree
+            left below them. Each subtree's indices are in increasing order, so
+            laying it out on its own breaks ties as from_points does.
+            The points are sorted along each axis once, and each level is then
+            split in linear time by partitioning those orders.
+            :complexity: O(N log N + L N) where N is the number of points and L
+            the number of levels
+        """
+        from balancing import axis_orders, split_subtree  # balancing imports this module
+
+        try:
+            orders, distinct = axis_orders(points)
+        except ValueError:
+            raise ValueError('Inserting duplicate item')
+        tasks = []
+        stack = [(orders, None, -1, 0)]
+        while stack:
+            orders, parent, octant, depth = stack.pop()
+            if depth == levels:
+                tasks.append((parent, octant, sorted(orders[0])))
+                continue
+            split, children = split_subtree(points, orders, distinct)
+            size = len(orders[0])
+            node = self.node_type(points[split], items[split], subtree_size=size, check_at=size + size // 2)
+            if parent is None:
+                self.root = node
+            else:
+                parent.children[octant] = node
+            for child_octant, child in enumerate(children):
+                if len(child[0]) > 0:
+                    stack.append((child, node, child_octant, depth + 1))
+        return tasks
+
+    def balance_report(self, min_side: int = MIN_SIDE) -> BalanceReport:
+        """
+            Measures the tree's shape in a single pass. A node's split is judged
+            along each axis by the ratio between the numbers of points on either
+            side of it; axes where both sides hold fewer than min_side points are
+            left out, as in the balancing tests.
+            :complexity: O(N) where N is the number of nodes
+        """
+        report = BalanceReport()
+        total_depth = 0
+        stack = [] if self.root is None else [(self.root, 0)]
+        while stack:
+            current, depth = stack.pop()
+            if depth == len(report.depth_histogram):
+                report.depth_histogram.append(0)
+            report.depth_histogram[depth] += 1
+            if current.live:
+                total_depth += depth
+
+            sizes = [0] * OCTANTS
+            for octant, child in enumerate(current.children):
+                if child is not None:
+                    sizes[octant] = child.subtree_size
+                    stack.append((child, depth + 1))
+            for axis, name in enumerate('xyz'):
+                bit = 1 << (2 - axis)
+                above = sum(size for octant, size in enumerate(sizes) if octant & bit)
+                below = current.subtree_size - current.live - above
+                if above < min_side and below < min_side:
+                    continue
+                ratio = float('inf') if min(above, below) == 0 else max(above, below) / min(above, below)
+                if ratio > report.worst_ratio:
+                    report.worst_ratio, report.worst_key, report.worst_axis = ratio, current.key, name
+
+        report.max_depth = max(len(report.depth_histogram) - 1, 0)
+        if self.length > 0:
+            report.average_path_length = total_depth / self.length + 1
+        return report
+
+    def freeze(self) -> FrozenThreeDeeBeeTree[I]:
+        """
+            Returns a read-only, NumPy-backed copy of the tree whose batch lookups
+            are vectorised. Later changes to this tree are not reflected in it.
+            :complexity: O(N) where N is the number of nodes
+        """
+        from frozen_threedeebeetree import FrozenThreeDeeBeeTree  # needs numpy
+
+        return FrozenThreeDeeBeeTree(self)
 
     def is_leaf(self, current: BeeNode) -> bool:
         """ Simple check whether or not the node is a leaf. """
-        raise NotImplementedError()
+        return current.children.count(None) == OCTANTS
+
+    def query_box(self, lo: Point, hi: Point) -> Iterator[tuple[Point, I]]:
+        """
+            Yields every (key, item) pair whose key lies inside the box with
+            corners lo and hi (inclusive on every side).
+            Octants that cannot meet the box are skipped without being visited.
+            :complexity: O(K + B) where K is the number of pairs yielded and B is
+            the number of visited nodes outside the box whose octants straddle it
+        """
+        stack = [] if self.root is None else [self.root]
+        while stack:
+            current = stack.pop()
+            key = current.key
+            if current.live and lo[0] <= key[0] <= hi[0] and lo[1] <= key[1] <= hi[1] and lo[2] <= key[2] <= hi[2]:
+                yield key, current.item
+            # reach_<axis>[side] tells whether that side of the split can meet the box.
+            reach_x = (lo[0] < key[0], hi[0] >= key[0])
+            reach_y = (lo[1] < key[1], hi[1] >= key[1])
+            reach_z = (lo[2] < key[2], hi[2] >= key[2])
+            for octant, child in enumerate(current.children):
+                if child is not None and reach_x[octant >> 2] and reach_y[octant >> 1 & 1] and reach_z[octant & 1]:
+                    stack.append(child)
+
+    def count_box(self, lo: Point, hi: Point) -> int:
+        """
+            Returns how many keys lie inside the box with corners lo and hi
+            (inclusive on every side), i.e. len(list(self.query_box(lo, hi))).
+            Each node's region is narrowed down from the tree's bounds by the
+            splits above it; a region wholly inside the box adds its subtree_size
+            without being descended into.
+            :complexity: O(B) where B is the number of visited nodes whose
+            regions straddle the boundary of the box
+        """
+        lo_x, lo_y, lo_z = lo
+        hi_x, hi_y, hi_z = hi
+        total = 0
+        stack = [] if self.root is None or not region_meets(self.bounds, lo, hi) else [(self.root, *self.bounds)]
+        while stack:
+            current, (min_x, min_y, min_z), (max_x, max_y, max_z) = stack.pop()
+            if lo_x <= min_x and max_x <= hi_x and lo_y <= min_y and max_y <= hi_y and lo_z <= min_z and max_z <= hi_z:
+                total += current.subtree_size
+                continue
+            x, y, z = current.key
+            if current.live and lo_x <= x <= hi_x and lo_y <= y <= hi_y and lo_z <= z <= hi_z:
+                total += 1
+            # Each side of a split as (low, high) along its axis, or None if it misses the box.
+            sides_x = ((min_x, x - 1) if lo_x < x else None, (x, max_x) if hi_x >= x else None)
+            sides_y = ((min_y, y - 1) if lo_y < y else None, (y, max_y) if hi_y >= y else None)
+            sides_z = ((min_z, z - 1) if lo_z < z else None, (z, max_z) if hi_z >= z else None)
+            for octant, child in enumerate(current.children):
+                if child is None:
+                    continue
+                side_x, side_y, side_z = sides_x[octant >> 2], sides_y[octant >> 1 & 1], sides_z[octant & 1]
+                if side_x is not None and side_y is not None and side_z is not None:
+                    stack.append((child, (side_x[0], side_y[0], side_z[0]), (side_x[1], side_y[1], side_z[1])))
+        return total
+
+    def nearest(self, point: Point, k: int = 1) -> list[tuple[Point, I]]:
+        """
+            Returns the k (key, item) pairs closest to point, nearest first.
+            Nodes are visited best-first by the distance from point to their
+            octant, stopping once no unvisited octant can beat the k-th best.
+            :complexity: O((V + k) log V) where V is the number of nodes visited
+        """
+        if k <= 0 or self.root is None:
+            return []
+        best = MaxHeap(k)   # (distance², key, item) of the k closest so far
+        tiebreak = count()
+        frontier = [(0, next(tiebreak), self.root, UNBOUNDED)]
+        while frontier:
+            bound, _, current, region = heapq.heappop(frontier)
+            if len(best) == k and bound >= best.peek_max()[0]:
+                break
+            distance = distance_squared(point, current.key)
+            if not current.live:
+                pass
+            elif len(best) < k:
+                best.add((distance, current.key, current.item))
+            elif distance < best.peek_max()[0]:
+                best.get_max()
+                best.add((distance, current.key, current.item))
+            for octant, child in enumerate(current.children):
+                if child is None:
+                    continue
+                sub_region = child_region(region, current.key, octant)
+                sub_bound = gap_squared(point, sub_region)
+                if len(best) < k or sub_bound < best.peek_max()[0]:
+                    heapq.heappush(frontier, (sub_bound, next(tiebreak), child, sub_region))
+
+        result = []
+        while len(best) > 0:
+            _, key, item = best.get_max()
+            result.append((key, item))
+        result.reverse()
+        return result
+
+    def within_radius(self, point: Point, r: float) -> list[tuple[Point, I]]:
+        """
+            Returns every (key, item) pair at most r away from point, nearest first.
+            Octants lying entirely further than r from point are never visited.
+            Raises ValueError if r is negative.
+            :complexity: O(V + K log K) where V is the number of nodes visited and
+            K is the number of pairs returned
+        """
+        if r < 0:
+            raise ValueError('Radius must not be negative')
+        limit = r * r
+        found = []
+        stack = [] if self.root is None else [(self.root, UNBOUNDED)]
+        while stack:
+            current, region = stack.pop()
+            distance = distance_squared(point, current.key)
+            if current.live and distance <= limit:
+                found.append((distance, current.key, current.item))
+            for octant, child in enumerate(current.children):
+                if child is None:
+                    continue
+                sub_region = child_region(region, current.key, octant)
+                if gap_squared(point, sub_region) <= limit:
+                    stack.append((child, sub_region))
+        found.sort(key=lambda entry: (entry[0], entry[1]))
+        return [(key, item) for _, key, item in found]
 
 if __name__ == "__main__":
     tdbt = ThreeDeeBeeTree()